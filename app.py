@@ -50,6 +50,19 @@ initialize_library_folders()
 db_manager = DatabaseManager()
 db_manager.add_column_if_not_exists()
 
+
+def resume_scans():
+    # Scan jobs interrupted by the last shutdown continue from their checkpoint
+    with app.app_context():
+        from modules.utilities import resume_interrupted_scans
+        resume_interrupted_scans()
+
+
+def run_scheduled_scans():
+    # Runs scan jobs with a schedule whenever their next run is due
+    from modules.scan_scheduler import run_scan_scheduler
+    run_scan_scheduler(app, shutdown_event)
+
 global last_trigger_time
 last_trigger_time = time.time()
 global last_modified
@@ -57,6 +70,16 @@ last_modified = ""
 
 shutdown_event = threading.Event()
 
+def forget_cached_size(event):
+    # The folder changed under the directory size cache, its size is measured again next time
+    from modules import db
+    from modules.directory_sizes import forget_directory_size
+    with app.app_context():
+        try:
+            forget_directory_size(db.engine, event.src_path, event.is_directory)
+        except Exception as e:
+            print(f"Error updating directory size cache for {event.src_path}: {e}")
+
 class MyHandler(FileSystemEventHandler):  
     global last_trigger_time
     last_trigger_time = time.time()
@@ -64,6 +87,7 @@ class MyHandler(FileSystemEventHandler):
     def on_created(self, event):
         global last_modified
         last_modified = event.src_path
+        forget_cached_size(event)
         if event.src_path.find('~') == -1:
             with app.app_context():
                 allowed_ext = current_app.config['ALLOWED_FILE_TYPES'] # List of allowed extensions.
@@ -88,6 +112,8 @@ class MyHandler(FileSystemEventHandler):
         global last_trigger_time
         global last_modified
         current_time = time.time()
+        if not event.is_directory:
+            forget_cached_size(event)
         if not event.is_directory and last_modified != event.src_path:
             if event.src_path.find('~') == -1 and (current_time - last_trigger_time) > 1:  
                 last_modified = event.src_path
@@ -131,6 +157,9 @@ if __name__ == "__main__":
             except KeyboardInterrupt:
                 shutdown_event.set()
 
+    threading.Thread(target=resume_scans, name="ScanResume", daemon=True).start()
+    threading.Thread(target=run_scheduled_scans, name="ScanScheduler", daemon=True).start()
+
     app.run(host="0.0.0.0", debug=True, use_reloader=False, port=5001)
     
 
@@ -0,0 +1,68 @@
+# Benchmarks game name cleaning against a corpus of real-world release names and checks the
+# results have not changed.
+# usage: python benchmark_name_normalizer.py [corpus.tsv] [--rounds 20] [--pool]
+# Each corpus line is "<raw folder or file name>\t<expected cleaned name>", cleaned with the
+# default release groups. Exits with 1 if any name is cleaned differently.
+
+import sys, time, argparse
+from modules import DEFAULT_RELEASE_GROUPS
+from modules.name_normalizer import NameNormalizer, normalize_name, release_group_patterns
+
+
+def load_corpus(path):
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line and not line.startswith('#'):
+                raw, expected = line.split('\t')
+                rows.append((raw, expected))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark game name cleaning")
+    parser.add_argument('corpus', nargs='?', default='benchmarks/release_names.tsv')
+    parser.add_argument('--rounds', type=int, default=20, help="times the corpus is cleaned")
+    parser.add_argument('--pool', action='store_true', help="also time clean_many on a process pool")
+    args = parser.parse_args()
+
+    rows = load_corpus(args.corpus)
+    insensitive_patterns, sensitive_patterns = release_group_patterns(
+        (group['rlsgroup'], group['rlsgroupcs']) for group in DEFAULT_RELEASE_GROUPS)
+    normalizer = NameNormalizer(insensitive_patterns, sensitive_patterns)
+
+    mismatches = [(raw, expected, normalize_name(raw, normalizer.regexes)) for raw, expected in rows
+                  if normalize_name(raw, normalizer.regexes) != expected]
+    for raw, expected, cleaned in mismatches:
+        print(f"MISMATCH {raw!r}: expected {expected!r}, got {cleaned!r}")
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for raw, _ in rows:
+            normalize_name(raw, normalizer.regexes)
+    elapsed = time.perf_counter() - start
+    print(f"Uncached: {elapsed / (args.rounds * len(rows)) * 1e6:.1f} us per name ({len(rows)} names x {args.rounds} rounds)")
+
+    normalizer.clean_many([raw for raw, _ in rows])
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        normalizer.clean_many([raw for raw, _ in rows])
+    elapsed = time.perf_counter() - start
+    print(f"Cached: {elapsed / (args.rounds * len(rows)) * 1e6:.1f} us per name")
+
+    if args.pool:
+        # Distinct names so nothing is served from the cache and the pool kicks in
+        names = [f"{raw} {number}" for number in range(args.rounds * 100) for raw, _ in rows]
+        pooled = NameNormalizer(insensitive_patterns, sensitive_patterns)
+        start = time.perf_counter()
+        pooled.clean_many(names)
+        elapsed = time.perf_counter() - start
+        print(f"Process pool: {len(names)} names in {elapsed:.2f}s ({elapsed / len(names) * 1e6:.1f} us per name)")
+
+    print(f"{len(rows) - len(mismatches)}/{len(rows)} names cleaned as expected")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
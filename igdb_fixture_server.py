@@ -0,0 +1,112 @@
+# Local stand-in for IGDB, the Twitch token endpoint and the IGDB image CDN, serving responses
+# recorded with IGDB_FIXTURE_RECORD_DIR so scans can be benchmarked and tested offline.
+#
+# 1. Record: set IGDB_FIXTURE_RECORD_DIR in config.py and run a scan against the real IGDB.
+# 2. Replay: python igdb_fixture_server.py --fixtures <dir> [--latency-ms 120 --jitter-ms 40 --rate-429 0.05]
+#    and point SharewareZ at it in config.py:
+#        IGDB_API_ENDPOINT = 'http://127.0.0.1:8787/v4/games'
+#        IGDB_TOKEN_URL = 'http://127.0.0.1:8787/oauth2/token'
+#        IGDB_IMAGE_BASE_URL = 'http://127.0.0.1:8787'
+#        IGDB_CACHE_ENABLED = False   (otherwise repeated runs are served from the response cache)
+
+import sys, json, time, random, argparse, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from modules.igdb_fixtures import load_fixture, recording_dir
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    fixtures_dir = ''
+    latency_ms = 0
+    jitter_ms = 0
+    rate_429 = 0.0
+    stats = {'served': 0, 'missing': 0, 'throttled': 0}
+    stats_lock = threading.Lock()
+
+    def _count(self, counter):
+        with self.stats_lock:
+            self.stats[counter] += 1
+
+    def _send(self, status, content, content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _handle(self, method):
+        body = b''
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+
+        delay = max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+        if delay:
+            time.sleep(delay)
+
+        path = urlparse(self.path).path
+        if path.endswith('/oauth2/token'):
+            token = {'access_token': 'fixture-token', 'expires_in': 86400, 'token_type': 'bearer'}
+            self._send(200, json.dumps(token).encode('utf-8'))
+            return
+
+        if self.rate_429 and random.random() < self.rate_429:
+            self._count('throttled')
+            self._send(429, json.dumps({'message': 'Too Many Requests'}).encode('utf-8'))
+            return
+
+        fixture = load_fixture(self.fixtures_dir, method, path, body)
+        if fixture is None:
+            self._count('missing')
+            print(f"No fixture for {method} {path} {body[:200]!r}")
+            self._send(404, json.dumps({'message': 'No recorded fixture for this request'}).encode('utf-8'))
+            return
+
+        meta, content = fixture
+        self._count('served')
+        self._send(meta.get('status', 200), content, meta.get('content_type', 'application/octet-stream'))
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded IGDB responses")
+    parser.add_argument('--fixtures', default=recording_dir(), help="fixture directory (default: IGDB_FIXTURE_RECORD_DIR)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--latency-ms', type=float, default=0, help="delay added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="random +/- variation of the delay")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+
+    if not args.fixtures:
+        print("No fixture directory given and IGDB_FIXTURE_RECORD_DIR is not set.")
+        sys.exit(1)
+
+    FixtureHandler.fixtures_dir = args.fixtures
+    FixtureHandler.latency_ms = args.latency_ms
+    FixtureHandler.jitter_ms = args.jitter_ms
+    FixtureHandler.rate_429 = args.rate_429
+
+    server = ThreadingHTTPServer((args.host, args.port), FixtureHandler)
+    print(f"Serving IGDB fixtures from {args.fixtures} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Fixture server stopped: {FixtureHandler.stats}")
+
+
+if __name__ == "__main__":
+    main()
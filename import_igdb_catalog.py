@@ -0,0 +1,22 @@
+# Builds the offline IGDB catalog index used to match game names without a live IGDB search.
+# usage: python import_igdb_catalog.py <games.jsonl> [index path]
+# The dump holds one IGDB game per line with id, name, alternative_names, platforms and cover.image_id,
+# e.g. exported with: fields id, name, alternative_names.name, platforms, cover.image_id;
+
+import sys
+from modules.igdb_catalog import import_catalog, catalog_path
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python import_igdb_catalog.py <games.jsonl> [index path]")
+        sys.exit(1)
+
+    dump_path = sys.argv[1]
+    index_path = sys.argv[2] if len(sys.argv) > 2 else catalog_path()
+    print(f"Importing IGDB catalog from {dump_path} into {index_path}")
+    import_catalog(dump_path, index_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -77,42 +77,45 @@ def create_app():
 
 
 
+DEFAULT_RELEASE_GROUPS = [
+{'rlsgroup': 'RAZOR', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'FLT', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'SKIDROW', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'CODEX', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'PLAZA', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'RELOADED', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'HOODLUM', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'CPY', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'FAIRLIGHT', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'HI2U', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'TiNYiSO', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'DARKSiDERS', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'Teke', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'Kw', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'PROPHET', 'rlsgroupcs': 'yes'},
+{'rlsgroup': 'GOG', 'rlsgroupcs': 'no'}, 
+{'rlsgroup': 'RUNE', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'Empress', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'AlcoholClone', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'DARKZER0', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'EMPRESS+Mr_Goldberg', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'ENGLISH-TL', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'ENLIGHT', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'FANiSO', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'FitGirl.Repack', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'FitGirl', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'I_KnoW', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'PROPER-CLONECD', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'Razor1911', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'TENOKE', 'rlsgroupcs': 'no'},
+{'rlsgroup': 'ZER0', 'rlsgroupcs': 'no'},
+   
+]
+
+
 def insert_default_release_groups():
     from modules.models import ReleaseGroup
-    default_release_groups = [
-    {'rlsgroup': 'RAZOR', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'FLT', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'SKIDROW', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'CODEX', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'PLAZA', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'RELOADED', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'HOODLUM', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'CPY', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'FAIRLIGHT', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'HI2U', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'TiNYiSO', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'DARKSiDERS', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'Teke', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'Kw', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'PROPHET', 'rlsgroupcs': 'yes'},
-    {'rlsgroup': 'GOG', 'rlsgroupcs': 'no'}, 
-    {'rlsgroup': 'RUNE', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'Empress', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'AlcoholClone', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'DARKZER0', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'EMPRESS+Mr_Goldberg', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'ENGLISH-TL', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'ENLIGHT', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'FANiSO', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'FitGirl.Repack', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'FitGirl', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'I_KnoW', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'PROPER-CLONECD', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'Razor1911', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'TENOKE', 'rlsgroupcs': 'no'},
-    {'rlsgroup': 'ZER0', 'rlsgroupcs': 'no'},
-       
-    ]
+    default_release_groups = DEFAULT_RELEASE_GROUPS
 
     existing_groups = ReleaseGroup.query.with_entities(ReleaseGroup.rlsgroup).all()
     existing_group_names = {group.rlsgroup for group in existing_groups}
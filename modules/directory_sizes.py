@@ -0,0 +1,99 @@
+# File: /modules/directory_sizes.py
+# Persistent cache of directory listings for folder sizes: per directory its mtime, the size of
+# the files directly in it and its subdirectories. A directory's mtime changes when entries are
+# added, removed or renamed in it, so measuring a tree with the cache only stats the directories
+# and re-lists those whose mtime changed. Files rewritten in place keep the directory's mtime;
+# the folder watcher forgets the directories it sees such changes in.
+
+import os
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from modules.models import DirectorySize
+
+# Directories listed within this many seconds of their mtime are listed again next time, as
+# filesystems like SMB and FAT only keep mtimes to about 2 seconds
+RACY_WINDOW = 2.0
+CHUNK_SIZE = 1000
+
+
+def _under(column, path):
+    # The directory and everything below it
+    path = path.rstrip('/\\')
+    return or_(column == path, column.startswith(path + os.sep, autoescape=True))
+
+
+class DirectorySizeCache:
+    """
+    The cached listings below one directory. load() and save() use their own session on the
+    given engine, so the cache is never part of the caller's transaction. With refresh, no
+    cached listing is used and every directory is listed and stored again.
+    """
+    def __init__(self, engine, refresh=False):
+        self.engine = engine
+        self.refresh = refresh
+        self.listings = {}
+
+    def load(self, path):
+        with Session(self.engine) as session:
+            rows = session.execute(select(DirectorySize.path, DirectorySize.mtime, DirectorySize.listed_at,
+                                          DirectorySize.files_size, DirectorySize.subdirs)
+                                   .where(_under(DirectorySize.path, path)))
+            self.listings = {row.path: (row.mtime, row.listed_at, row.files_size, row.subdirs or [])
+                             for row in rows}
+        return self
+
+    def get(self, path, mtime):
+        """
+        The cached files size and subdirectory names of a directory if its mtime is unchanged
+        since it was listed, else None.
+        """
+        listing = self.listings.get(path)
+        if listing is None or self.refresh:
+            return None
+        cached_mtime, listed_at, files_size, subdirs = listing
+        if cached_mtime != mtime or listed_at is None or mtime >= listed_at - RACY_WINDOW:
+            return None
+        return files_size, subdirs
+
+    def save(self, listings):
+        """
+        Stores fresh listings, {path: (mtime, listed_at, files_size, subdir names)}, and forgets
+        the subdirectories that disappeared from them.
+        """
+        removed = []
+        for path, (mtime, _, files_size, subdirs) in list(listings.items()):
+            previous = self.listings.get(path)
+            if previous is None:
+                continue
+            if self.get(path, mtime) == (files_size, subdirs):
+                # Listed again although the stored listing is still valid, e.g. the inspected folder itself
+                del listings[path]
+            else:
+                removed.extend(os.path.join(path, name) for name in set(previous[3]) - set(subdirs))
+        if not listings:
+            return
+        rows = [{'path': path, 'mtime': mtime, 'listed_at': listed_at, 'files_size': files_size, 'subdirs': subdirs}
+                for path, (mtime, listed_at, files_size, subdirs) in listings.items()]
+        with Session(self.engine) as session:
+            for start in range(0, len(rows), CHUNK_SIZE):
+                statement = insert(DirectorySize).values(rows[start:start + CHUNK_SIZE])
+                session.execute(statement.on_conflict_do_update(
+                    index_elements=['path'],
+                    set_={column: statement.excluded[column] for column in ('mtime', 'listed_at', 'files_size', 'subdirs')}
+                ))
+            for path in removed:
+                session.execute(delete(DirectorySize).where(_under(DirectorySize.path, path)))
+            session.commit()
+        self.listings.update(listings)
+
+
+def forget_directory_size(engine, path, is_directory=False):
+    """
+    Drops the cached listing of the directory an event happened in (path itself for a
+    directory), so its size is measured again.
+    """
+    directory = path if is_directory else os.path.dirname(path)
+    with Session(engine) as session:
+        session.execute(delete(DirectorySize).where(DirectorySize.path == directory.rstrip('/\\')))
+        session.commit()
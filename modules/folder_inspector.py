@@ -0,0 +1,211 @@
+# File: /modules/folder_inspector.py
+# One pass over a game folder that collects everything the app needs from it: total size
+# without the updates and extras folders, the first NFO, the files at the top level and the
+# entries of the updates and extras folders. Directories are listed in parallel with os.scandir.
+
+import os, threading, time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import Config
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Shared by all inspections, so parallel scans do not multiply the number of threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=getattr(Config, 'INSPECTOR_WORKERS', 8),
+                                           thread_name_prefix='folder-inspector')
+        return _executor
+
+
+def is_significant_file(name):
+    # Files that make up a game, as opposed to its .nfo, .sfv and file_id.diz
+    name = name.lower()
+    return not name.endswith(('.nfo', '.sfv')) and name != 'file_id.diz'
+
+
+def read_nfo(nfo_path):
+    try:
+        with open(nfo_path, 'r', encoding='utf-8', errors='ignore') as nfo_file:
+            return nfo_file.read().replace('\x00', '')
+    except Exception as e:
+        print(f"Error reading NFO file {nfo_path}: {str(e)}")
+        return None
+
+
+def _list_directory(path, skip_names, size_cache=None):
+    """
+    Lists one directory. Returns the bytes of its files, the sub directories to descend into,
+    leaving out those named in skip_names (lowercase), and with a size cache the fresh listing
+    to store, None if the cached one was still valid.
+    """
+    if size_cache is not None:
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            print(f"Error accessing directory {path}: {e}")
+            return 0, [], None
+        cached = size_cache.get(path, mtime)
+        if cached is not None:
+            size, names = cached
+            return size, [os.path.join(path, name) for name in names if name.lower() not in skip_names], None
+        listed_at = time.time()
+
+    size = 0
+    names = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        names.append(entry.name)
+                    elif entry.is_file():
+                        size += entry.stat().st_size
+                except OSError:
+                    pass
+    except OSError as e:
+        print(f"Error accessing directory {path}: {e}")
+        return size, [], None
+    listing = (mtime, listed_at, size, names) if size_cache is not None else None
+    return size, [os.path.join(path, name) for name in names if name.lower() not in skip_names], listing
+
+
+def measure_trees(roots, skip_names=frozenset(), size_cache=None, listings=None):
+    """
+    Total size of each directory tree in roots, as {root: bytes}. Directories are listed on
+    the shared pool and every listing submits its sub directories, so no worker ever waits on
+    another one. With a DirectorySizeCache loaded for the trees, directories whose mtime did
+    not change are not listed again; fresh listings are stored along with those passed in.
+    """
+    totals = {root: 0 for root in roots}
+    listings = dict(listings or {})
+    executor = _get_executor()
+    pending = {executor.submit(_list_directory, root, skip_names, size_cache): (root, root) for root in roots}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            root, path = pending.pop(future)
+            size, subdirs, listing = future.result()
+            totals[root] += size
+            if listing is not None:
+                listings[path] = listing
+            for subdir in subdirs:
+                pending[executor.submit(_list_directory, subdir, skip_names, size_cache)] = (root, subdir)
+    if size_cache is not None and listings:
+        try:
+            size_cache.save(listings)
+        except Exception as e:
+            print(f"Error saving directory sizes: {e}")
+    return totals
+
+
+class FolderInspection:
+    """
+    What inspect_folder found:
+        size_bytes: total size without the updates and extras folders, None if not measured
+        nfo_path, nfo_content: the first .nfo file at the top level
+        files: names of the files at the top level
+        significant_files: those of them that are not .nfo, .sfv or file_id.diz
+        updates, extras: entries of the updates and extras folders as dicts with name, path,
+            is_file and size, if listed
+    """
+    def __init__(self, path):
+        self.path = path
+        self.size_bytes = None
+        self.nfo_path = None
+        self.nfo_content = None
+        self.files = []
+        self.updates = []
+        self.extras = []
+
+    @property
+    def significant_files(self):
+        return [name for name in self.files if is_significant_file(name)]
+
+
+def _list_special_folder(path):
+    entries = []
+    try:
+        with os.scandir(path) as children:
+            for child in children:
+                try:
+                    is_file = child.is_file()
+                    entries.append({'name': child.name, 'path': child.path, 'is_file': is_file,
+                                    'size': child.stat().st_size if is_file else 0})
+                except OSError:
+                    pass
+    except OSError as e:
+        print(f"Error accessing directory {path}: {e}")
+    return entries
+
+
+def inspect_folder(path, update_folder_name=None, extras_folder_name=None, measure=True, read_nfo_content=True,
+                   list_special=False, size_cache=None):
+    """
+    Inspects a game folder (or single game file) in one pass.
+
+    Args:
+        update_folder_name, extras_folder_name: folders left out of the size, at any depth
+        measure: compute size_bytes, which walks the whole tree
+        read_nfo_content: read the first NFO into nfo_content
+        list_special: list the entries of the updates and extras folders, with sizes
+        size_cache: a DirectorySizeCache to measure with, so unchanged directories are not listed
+    """
+    inspection = FolderInspection(path)
+    if os.path.isfile(path):
+        inspection.files = [os.path.basename(path)]
+        inspection.size_bytes = os.path.getsize(path)
+        return inspection
+
+    special = {name.lower(): key for name, key in ((update_folder_name, 'updates'), (extras_folder_name, 'extras')) if name}
+    skip_names = frozenset(special)
+    size = 0
+    subdirs = []
+    names = []
+    try:
+        listed = (os.stat(path).st_mtime, time.time())
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        names.append(entry.name)
+                        key = special.get(entry.name.lower())
+                        if key is None:
+                            subdirs.append(entry.path)
+                        elif list_special:
+                            setattr(inspection, key, _list_special_folder(entry.path))
+                    elif entry.is_file():
+                        inspection.files.append(entry.name)
+                        if measure:
+                            size += entry.stat().st_size
+                        if inspection.nfo_path is None and entry.name.lower().endswith('.nfo'):
+                            inspection.nfo_path = entry.path
+                except OSError:
+                    pass
+    except OSError as e:
+        print(f"Error accessing directory {path}: {e}")
+        return inspection
+
+    special_dirs = [entry for entry in inspection.updates + inspection.extras if not entry['is_file']]
+    if measure or special_dirs:
+        if size_cache is not None:
+            try:
+                size_cache.load(path)
+            except Exception as e:
+                print(f"Error loading directory sizes for {path}: {e}")
+                size_cache = None
+        # The folder itself is stored too, so the cache forgets its removed subdirectories
+        totals = measure_trees(subdirs if measure else [], skip_names, size_cache,
+                               {path: listed + (size, names)} if measure else None)
+        totals.update(measure_trees([entry['path'] for entry in special_dirs], size_cache=size_cache))
+        if measure:
+            inspection.size_bytes = size + sum(totals[subdir] for subdir in subdirs)
+        for entry in special_dirs:
+            entry['size'] = totals[entry['path']]
+
+    if read_nfo_content and inspection.nfo_path:
+        inspection.nfo_content = read_nfo(inspection.nfo_path)
+    return inspection
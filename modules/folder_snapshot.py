@@ -0,0 +1,130 @@
+# File: /modules/folder_snapshot.py
+# Snapshot of the entries of a library's scan roots (inode, mtime, entry count, mtime of the
+# updates folder) as of the last scan that processed them. A rescan diffs the live tree against
+# it and only passes added and modified entries on to the scan pipeline; removed entries are
+# dropped from the snapshot.
+# Entries are saved batch by batch as the scan processes them, so a scan does not hold the
+# live state of the whole tree.
+
+import os, time
+from sqlalchemy.dialects.postgresql import insert
+from modules import db
+from modules.models import FolderSnapshotEntry, UnmatchedFolder
+
+# Filesystems like SMB and FAT only keep mtimes to about 2 seconds, so a folder changed right
+# after it was snapshotted can keep the same mtime. Such entries are also compared by entry count.
+RACY_WINDOW = 2.0
+CHUNK_SIZE = 1000
+
+
+def entry_count(path):
+    try:
+        with os.scandir(path) as entries:
+            return sum(1 for _ in entries)
+    except NotADirectoryError:
+        return 0
+
+
+def updates_mtime(path, updates_folder_name):
+    # New updates land in the game's updates folder and leave the mtime of the game folder alone
+    if not updates_folder_name:
+        return None
+    try:
+        return os.stat(os.path.join(path, updates_folder_name)).st_mtime
+    except OSError:
+        return None
+
+
+class FolderSnapshot:
+    """
+    The snapshot of one scan root of a library. changed() runs in the discovery thread and
+    stats the live entries; save() runs in the scan thread after each batch and records the
+    entries the scan processed, finish() once the scan is over. An entry whose updates folder
+    changed counts as modified, so the scan picks up its new updates.
+    """
+    def __init__(self, library_uuid, scan_root, updates_folder_name=None):
+        self.library_uuid = library_uuid
+        self.scan_root = scan_root
+        self.updates_folder_name = updates_folder_name
+        self.entries = {
+            entry.path: (entry.inode, entry.mtime, entry.entry_count, entry.updates_mtime, entry.scanned_at)
+            for entry in FolderSnapshotEntry.query.filter_by(library_uuid=library_uuid, scan_root=scan_root)
+        }
+        # Filled by changed(): path -> (inode, mtime, entry count, updates mtime, scanned at) of added
+        # and modified entries until save() records them
+        self.live = {}
+        self.seen = set()
+        self.modified = 0
+        self.unchanged = 0
+        self.complete = False
+
+    def _is_unchanged(self, path, stat, current_updates_mtime, previous):
+        inode, mtime, count, previous_updates_mtime, scanned_at = previous
+        if inode != stat.st_ino or mtime != stat.st_mtime or previous_updates_mtime != current_updates_mtime:
+            return False
+        if scanned_at is not None and current_updates_mtime is not None and current_updates_mtime >= scanned_at - RACY_WINDOW:
+            # Updates folders changed right around the last scan are looked at again
+            return False
+        if scanned_at is None or stat.st_mtime >= scanned_at - RACY_WINDOW:
+            return count == entry_count(path)
+        return True
+
+    def changed(self, entries, known_paths):
+        """
+        Wraps the discovered entries of a scan: entries already in the library (added or logged
+        as unmatched) that match the snapshot are left out, everything else is passed on.
+        """
+        for item in entries:
+            path = item['full_path']
+            self.seen.add(path)
+            try:
+                stat = os.stat(path)
+                current_updates_mtime = updates_mtime(path, self.updates_folder_name)
+                previous = self.entries.get(path)
+                if previous and path in known_paths and self._is_unchanged(path, stat, current_updates_mtime, previous):
+                    self.unchanged += 1
+                    continue
+                self.live[path] = (stat.st_ino, stat.st_mtime, entry_count(path), current_updates_mtime, time.time())
+                self.modified += 1
+            except OSError as e:
+                print(f"Could not stat {path} for the folder snapshot: {e}")
+            yield item
+        # Only a full listing tells which entries were removed
+        self.complete = True
+        print(f"Folder snapshot of {self.scan_root}: {self.modified} added or modified, {self.unchanged} unchanged.")
+
+    def save(self, processed_paths):
+        """
+        Records the live state of the added and modified entries the scan processed. The
+        caller commits.
+        """
+        paths = [path for path in processed_paths if path in self.live]
+        for start in range(0, len(paths), CHUNK_SIZE):
+            rows = [{'library_uuid': self.library_uuid, 'scan_root': self.scan_root, 'path': path,
+                     'inode': self.live[path][0], 'mtime': self.live[path][1], 'entry_count': self.live[path][2],
+                     'updates_mtime': self.live[path][3], 'scanned_at': self.live[path][4]}
+                    for path in paths[start:start + CHUNK_SIZE]]
+            statement = insert(FolderSnapshotEntry).values(rows)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['library_uuid', 'path'],
+                set_={column: statement.excluded[column] for column in
+                      ('scan_root', 'inode', 'mtime', 'entry_count', 'updates_mtime', 'scanned_at')}
+            ))
+        for path in paths:
+            del self.live[path]
+
+    def finish(self):
+        """
+        If the scan root was listed completely, forgets removed entries and their unmatched
+        folder log. The caller commits.
+        """
+        if not self.complete:
+            return
+        removed = [path for path in self.entries if path not in self.seen]
+        for start in range(0, len(removed), CHUNK_SIZE):
+            chunk = removed[start:start + CHUNK_SIZE]
+            FolderSnapshotEntry.query.filter(FolderSnapshotEntry.library_uuid == self.library_uuid,
+                                             FolderSnapshotEntry.path.in_(chunk)).delete(synchronize_session=False)
+            UnmatchedFolder.query.filter(UnmatchedFolder.folder_path.in_(chunk)).delete(synchronize_session=False)
+        if removed:
+            print(f"Folder snapshot of {self.scan_root}: {len(removed)} entries removed since the last scan.")
@@ -31,6 +31,7 @@ class AutoScanForm(FlaskForm):
     folder_path = StringField('Browse Folder Path', validators=[DataRequired()])
     library_uuid = SelectField('Select Library', coerce=str, validators=[DataRequired()])
     scan_mode = RadioField('Select Scan Mode', choices=[('folders', 'My Games are Folders'), ('files', 'My Games are Files')], default='folders')
+    schedule = SelectField('Repeat Scan', choices=[('', 'Run Once'), ('8_hours', 'Every 8 Hours'), ('24_hours', 'Every 24 Hours'), ('48_hours', 'Every 48 Hours')], default='')
     submit = SubmitField('AutoScan')
 
 
@@ -202,6 +203,7 @@ class LibraryForm(FlaskForm):
     name = StringField('Library Name', validators=[DataRequired()])
     platform = SelectField('Platform', choices=[(choice.value, choice.name) for choice in LibraryPlatform], validators=[DataRequired()])
     image = FileField('Library Image', validators=[FileAllowed(['jpg', 'jpeg', 'png'], 'Images only!')])
+    scan_concurrency = IntegerField('Parallel Scan Workers', validators=[Optional(), NumberRange(min=1, max=32)])
 
 class ThemeUploadForm(FlaskForm):
     theme_zip = FileField('Theme ZIP File', validators=[
@@ -0,0 +1,240 @@
+# File: /modules/http_client.py
+# Shared keep-alive HTTP sessions for outbound IGDB, image CDN and Discord traffic
+
+import threading, time, random
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from modules.igdb_fixtures import should_record, record_response
+
+# (connect, read) timeout applied to every outbound request that does not pass its own
+DEFAULT_TIMEOUT = (getattr(Config, 'HTTP_CONNECT_TIMEOUT', 5), getattr(Config, 'HTTP_READ_TIMEOUT', 30))
+
+# One pooled session per host, so a scan reuses a handful of connections to
+# api.igdb.com / images.igdb.com instead of a new TCP + TLS handshake per call.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _create_session():
+    pool_connections = getattr(Config, 'HTTP_POOL_CONNECTIONS', 4)
+    pool_maxsize = getattr(Config, 'HTTP_POOL_MAXSIZE', 16)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+    return session
+
+
+def get_http_session(url):
+    """
+    Returns the shared session for the host of the given URL, creating it on first use.
+    """
+    host = urlparse(url).netloc.lower()
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _create_session()
+            _sessions[host] = session
+        return session
+
+
+def close_http_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised instead of sending a request while the circuit breaker of its host is open.
+    Subclasses RequestException so existing error handling treats it as a failed request.
+    """
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit breaker open for {host}, retrying in {retry_in:.0f} seconds")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. After `failure_threshold` consecutive connection errors or 5xx
+    responses the circuit opens and requests fail fast for `reset_timeout` seconds. The first
+    request after that is let through as a trial (half-open): success closes the circuit again,
+    failure reopens it for another `reset_timeout`.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=60):
+        self.host = host
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_request(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if self._state == self.OPEN and retry_in <= 0:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(self.host, max(retry_in, 0))
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                print(f"Circuit breaker for {self.host} closed, host is reachable again")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit breaker for {self.host} opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def cancel_trial(self):
+        # The trial request ended without telling us anything about the host
+        with self._lock:
+            self._trial_in_flight = False
+
+    def is_open(self):
+        """
+        True while requests to the host would fail fast, False once a trial request may go out.
+        """
+        with self._lock:
+            return self._state == self.OPEN and time.monotonic() < self._opened_at + self.reset_timeout
+
+    def seconds_until_retry(self):
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(self._opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def get_state(self):
+        with self._lock:
+            return {'host': self.host, 'state': self._state, 'consecutive_failures': self._failures}
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url):
+    host = urlparse(url).netloc.lower()
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                host,
+                failure_threshold=getattr(Config, 'HTTP_BREAKER_THRESHOLD', 5),
+                reset_timeout=getattr(Config, 'HTTP_BREAKER_RESET', 60)
+            )
+            _breakers[host] = breaker
+        return breaker
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """
+    Full-jitter exponential backoff: a random delay between 0 and base * 2^attempt, capped.
+    """
+    base = getattr(Config, 'HTTP_BACKOFF_BASE', 1.0) if base is None else base
+    cap = getattr(Config, 'HTTP_BACKOFF_MAX', 30) if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request_with_retry(method, url, retries=None, attempt_context=None, **kwargs):
+    """
+    Sends a request over the pooled session of its host with default timeouts. Connection
+    errors, timeouts, 429 and 5xx responses are retried with jittered exponential backoff,
+    honouring Retry-After when the server sends it. Connection errors and 5xx responses count
+    against the circuit breaker of the host; a 429 does not, since the host is up but busy.
+
+    attempt_context: optional callable returning a context manager entered around each attempt,
+    e.g. a rate limiter slot.
+
+    Returns the last requests.Response. Raises CircuitOpenError while the host is marked down,
+    or the last RequestException once the retries are used up.
+    """
+    retries = getattr(Config, 'HTTP_MAX_RETRIES', 3) if retries is None else retries
+    kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+    session = get_http_session(url)
+    breaker = get_circuit_breaker(url)
+
+    for attempt in range(retries + 1):
+        breaker.before_request()
+        try:
+            if attempt_context is not None:
+                with attempt_context():
+                    response = session.request(method, url, **kwargs)
+            else:
+                response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            breaker.record_failure()
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"{method} {url} failed ({e}), retrying in {delay:.1f} seconds")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            breaker.cancel_trial()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if attempt == retries:
+                return response
+            delay = _retry_after_seconds(response)
+            if delay is None:
+                delay = backoff_delay(attempt)
+            print(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f} seconds")
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        if response.status_code == 200 and should_record(url):
+            record_response(method, url, kwargs.get('data'), response)
+        return response
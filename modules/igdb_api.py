@@ -1,22 +1,286 @@
 # File: /modules/igdb_api.py
 # This file contains functions for interacting with the IGDB API extracted from routes.py
 
+import threading, time, heapq, itertools
+from contextlib import contextmanager
 import requests
 from config import Config
+from modules.http_client import request_with_retry, get_circuit_breaker
 
-def make_igdb_api_request(endpoint, query):
-    headers = {
-        'Client-ID': Config.IGDB_CLIENT_ID,
-        'Authorization': f'Bearer {Config.IGDB_ACCESS_TOKEN}',
-        'Accept': 'application/json'
+TOKEN_URL = getattr(Config, 'IGDB_TOKEN_URL', "https://id.twitch.tv/oauth2/token")
+IGDB_IMAGE_HOST = "https://images.igdb.com"
+
+
+def igdb_endpoint(name):
+    """
+    URL of an IGDB endpoint on the same base as IGDB_API_ENDPOINT, e.g. igdb_endpoint('covers'),
+    so pointing IGDB_API_ENDPOINT at the fixture server redirects every endpoint.
+    """
+    return Config.IGDB_API_ENDPOINT.rsplit('/', 1)[0] + '/' + name
+
+
+def igdb_image_url(url):
+    """
+    Normalizes an IGDB image URL to https and moves it to IGDB_IMAGE_BASE_URL when one is set.
+    """
+    if url.startswith('//'):
+        url = 'https:' + url
+    image_base_url = getattr(Config, 'IGDB_IMAGE_BASE_URL', '')
+    if image_base_url and url.startswith(IGDB_IMAGE_HOST):
+        url = image_base_url.rstrip('/') + url[len(IGDB_IMAGE_HOST):]
+    return url
+
+
+def fetch_access_token(client_id, client_secret):
+    """
+    Requests a new client-credentials token from Twitch.
+
+    Returns:
+        tuple: (access_token, expires_in seconds), or (None, 0) on failure.
+    """
+    params = {
+        'client_id': client_id,
+        'client_secret': client_secret,
+        'grant_type': 'client_credentials'
     }
-    response = requests.post(endpoint, headers=headers, data=query)
+    try:
+        response = request_with_retry('POST', TOKEN_URL, params=params)
+    except requests.RequestException as e:
+        print(f"Failed to obtain access token: {e}")
+        return None, 0
+    if response.status_code == 200:
+        data = response.json()
+        return data['access_token'], int(data.get('expires_in', 0))
+    print(f"Failed to obtain access token. Status Code: {response.status_code}")
+    return None, 0
+
+
+class IGDBTokenManager:
+    """
+    Holds the IGDB access token for its full lifetime instead of requesting a new one
+    for every API call. The token is refreshed under a lock shortly before it expires,
+    so concurrent scan and request threads share a single refresh.
+    """
+    def __init__(self, refresh_margin=300):
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token = None
+        self._client_id = None
+        self._expires_at = 0
+
+    def get_token(self, client_id, client_secret):
+        with self._lock:
+            if self._needs_refresh(client_id):
+                self._refresh(client_id, client_secret)
+            return self._token
+
+    def invalidate(self, token):
+        # Only drop the token that was rejected, another thread may already have replaced it
+        with self._lock:
+            if self._token == token:
+                self._token = None
+                self._expires_at = 0
+
+    def _needs_refresh(self, client_id):
+        if self._token is None or self._client_id != client_id:
+            return True
+        return time.time() >= self._expires_at - self.refresh_margin
+
+    def _refresh(self, client_id, client_secret):
+        token, expires_in = fetch_access_token(client_id, client_secret)
+        self._token = token
+        self._client_id = client_id if token else None
+        self._expires_at = time.time() + expires_in if token else 0
+        if token:
+            print(f"Obtained new IGDB access token valid for {expires_in} seconds")
+
+
+token_manager = IGDBTokenManager()
+
+
+# Priority lanes for IGDB traffic, lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_LANES = {PRIORITY_INTERACTIVE: 'interactive', PRIORITY_BULK: 'bulk'}
+
+
+class IGDBRateLimiter:
+    """
+    Process-wide token bucket shaping all IGDB traffic. IGDB allows about 4 requests per
+    second with a small number of open requests, so scan threads, image refresh threads and
+    admin lookups all wait here for a slot. Waiting callers are served by priority lane first
+    and arrival order second, which lets interactive admin lookups overtake bulk scan traffic.
+    """
+    def __init__(self, rate=4.0, burst=4, max_concurrent=8):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._cond = threading.Condition()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._stats = {lane: {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0} for lane in PRIORITY_LANES}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """
+        Blocks until the caller may send one request. Returns the seconds spent waiting.
+        """
+        started = time.monotonic()
+        ticket = (priority, next(self._sequence))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    self._refill()
+                    is_next = self._waiting[0] == ticket
+                    if is_next and self._active < self.max_concurrent and self._tokens >= 1:
+                        break
+                    timeout = None
+                    if is_next and self._active < self.max_concurrent:
+                        timeout = (1 - self._tokens) / self.rate
+                    self._cond.wait(timeout)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._tokens -= 1
+            self._active += 1
+
+            waited = time.monotonic() - started
+            lane_stats = self._stats.setdefault(priority, {'requests': 0, 'total_wait': 0.0, 'max_wait': 0.0})
+            lane_stats['requests'] += 1
+            lane_stats['total_wait'] += waited
+            lane_stats['max_wait'] = max(lane_stats['max_wait'], waited)
+            # The next caller in line may already be able to go
+            self._cond.notify_all()
+        return waited
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_INTERACTIVE):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self):
+        with self._cond:
+            queue_depth = {PRIORITY_LANES.get(lane, str(lane)): 0 for lane in self._stats}
+            for priority, _ in self._waiting:
+                lane = PRIORITY_LANES.get(priority, str(priority))
+                queue_depth[lane] = queue_depth.get(lane, 0) + 1
+            lanes = {}
+            for priority, lane_stats in self._stats.items():
+                requests_count = lane_stats['requests']
+                lanes[PRIORITY_LANES.get(priority, str(priority))] = {
+                    'requests': requests_count,
+                    'queue_depth': queue_depth.get(PRIORITY_LANES.get(priority, str(priority)), 0),
+                    'avg_wait_seconds': round(lane_stats['total_wait'] / requests_count, 3) if requests_count else 0.0,
+                    'max_wait_seconds': round(lane_stats['max_wait'], 3)
+                }
+            return {
+                'rate_per_second': self.rate,
+                'max_concurrent': self.max_concurrent,
+                'active_requests': self._active,
+                'queue_depth': len(self._waiting),
+                'lanes': lanes
+            }
+
+
+rate_limiter = IGDBRateLimiter(
+    rate=getattr(Config, 'IGDB_RATE_LIMIT', 4),
+    burst=getattr(Config, 'IGDB_RATE_LIMIT', 4),
+    max_concurrent=getattr(Config, 'IGDB_MAX_CONCURRENT', 8)
+)
+
+_priority_context = threading.local()
+
+
+@contextmanager
+def igdb_priority(priority):
+    """
+    Runs the enclosed IGDB calls of the current thread in the given priority lane,
+    e.g. `with igdb_priority(PRIORITY_BULK):` around a library scan.
+    """
+    previous = getattr(_priority_context, 'priority', None)
+    _priority_context.priority = priority
+    try:
+        yield
+    finally:
+        _priority_context.priority = previous
+
+
+def current_igdb_priority():
+    priority = getattr(_priority_context, 'priority', None)
+    return PRIORITY_INTERACTIVE if priority is None else priority
+
+
+def post_igdb_request(endpoint, query, client_id, client_secret):
+    """
+    Sends an IGDB query using the cached access token, shaped by the shared rate limiter in the
+    priority lane of the calling thread. A 401 means the token was revoked or expired early,
+    so it is discarded and the request is retried once with a new token. Timeouts, 429 and 5xx
+    responses are retried with backoff by request_with_retry, and CircuitOpenError is raised
+    without contacting IGDB while it is considered down.
+
+    Returns:
+        requests.Response, or None if no access token could be obtained.
+    """
+    access_token = token_manager.get_token(client_id, client_secret)
+    if not access_token:
+        return None
+
+    priority = current_igdb_priority()
+    response = None
+    for attempt in range(2):
+        headers = {
+            'Client-ID': client_id,
+            'Authorization': f'Bearer {access_token}',
+            'Accept': 'application/json'
+        }
+        response = request_with_retry('POST', endpoint, headers=headers, data=query,
+                                      attempt_context=lambda: rate_limiter.slot(priority))
+        if response.status_code != 401 or attempt == 1:
+            break
+        print("IGDB rejected the access token, refreshing and retrying once")
+        token_manager.invalidate(access_token)
+        access_token = token_manager.get_token(client_id, client_secret)
+        if not access_token:
+            break
+    return response
+
+
+def igdb_circuit_breaker():
+    return get_circuit_breaker(Config.IGDB_API_ENDPOINT)
+
+
+def make_igdb_api_request(endpoint, query):
+    try:
+        response = post_igdb_request(endpoint, query, Config.IGDB_CLIENT_ID, Config.IGDB_CLIENT_SECRET)
+    except requests.RequestException as e:
+        return {"error": f"API Request failed: {e}"}
+    if response is None:
+        return {"error": "Failed to retrieve access token"}
     return response.json()
 
 def get_cover_thumbnail_url(igdb_id):
-    endpoint = "https://api.igdb.com/v4/covers"
+    endpoint = igdb_endpoint("covers")
     query = f"fields url; where game={igdb_id};"
     response = make_igdb_api_request(endpoint, query)
     if response:
         return response[0]['url']
-    return None
\ No newline at end of file
+    return None
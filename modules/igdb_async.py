@@ -0,0 +1,92 @@
+# File: /modules/igdb_async.py
+# asyncio client that overlaps IGDB and image CDN lookups, with a synchronous facade for
+# the Flask request threads and scan threads
+
+import asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, has_app_context
+from config import Config
+from modules.igdb_api import igdb_priority, current_igdb_priority
+
+
+class AsyncIGDBClient:
+    """
+    Hosts an asyncio event loop in a background thread. Lookups submitted through map() run
+    concurrently on the loop's executor, each still passing through the shared IGDB rate
+    limiter, so overlapping them never exceeds the global request budget.
+
+    The HTTP layer (pooled requests sessions, retries, circuit breaker, cache) is blocking,
+    so each lookup runs in an executor thread and the loop schedules and gathers them.
+    """
+    def __init__(self, max_workers=8):
+        self.max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._worker_context = threading.local()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._loop.set_default_executor(
+                    ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='igdb-async')
+                )
+                self._thread = threading.Thread(target=self._loop.run_forever, name='igdb-async-loop', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _in_worker(self):
+        return getattr(self._worker_context, 'active', False)
+
+    async def call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def gather(self, func, args_list):
+        return await asyncio.gather(*(self.call(func, *args) for args in args_list), return_exceptions=True)
+
+    def run(self, coroutine):
+        """
+        Runs a coroutine on the background loop and blocks until it completes.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def map(self, func, args_list):
+        """
+        Calls func(*args) for every entry of args_list concurrently and returns the results in the
+        same order. An exception raised by a call is returned in its place instead of raised.
+
+        The Flask app context and IGDB priority lane of the caller are carried into each call.
+        Calls made from inside a worker run inline so nested use cannot exhaust the executor.
+        """
+        args_list = [tuple(args) for args in args_list]
+        if not args_list:
+            return []
+
+        app = current_app._get_current_object() if has_app_context() else None
+        priority = current_igdb_priority()
+
+        def bound(*args):
+            self._worker_context.active = True
+            try:
+                with igdb_priority(priority):
+                    if app is None:
+                        return func(*args)
+                    with app.app_context():
+                        return func(*args)
+            finally:
+                self._worker_context.active = False
+
+        if len(args_list) == 1 or self._in_worker():
+            results = []
+            for args in args_list:
+                try:
+                    results.append(func(*args))
+                except Exception as e:
+                    results.append(e)
+            return results
+        return self.run(self.gather(bound, args_list))
+
+
+igdb_async = AsyncIGDBClient(max_workers=getattr(Config, 'IGDB_MAX_CONCURRENT', 8))
@@ -0,0 +1,206 @@
+# File: /modules/igdb_cache.py
+# Persistent cache of IGDB responses, shared by scans, re-identification and the admin identify UI,
+# plus the negative cache of names IGDB found no match for
+
+import re, hashlib, threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from config import Config
+from modules import db
+from modules.models import IGDBCacheEntry, IGDBNegativeMatch
+
+# Seconds a cached response stays valid, by the last path segment of the endpoint
+DEFAULT_TTLS = {
+    'games': 7 * 86400,
+    'multiquery': 7 * 86400,
+    'covers': 30 * 86400,
+    'screenshots': 30 * 86400,
+    'websites': 7 * 86400,
+    'involved_companies': 30 * 86400,
+}
+
+# Run eviction after this many stores instead of on every write
+EVICTION_INTERVAL = 100
+
+_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(counter, amount=1):
+    with _stats_lock:
+        _stats[counter] += amount
+
+
+def normalize_query(query):
+    # Whitespace and trailing semicolon layout do not change what IGDB returns
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+def make_cache_key(endpoint, query):
+    return hashlib.sha256(f"{endpoint.rstrip('/')}\n{normalize_query(query)}".encode('utf-8')).hexdigest()
+
+
+def endpoint_ttl(endpoint):
+    name = urlparse(endpoint).path.rstrip('/').rsplit('/', 1)[-1]
+    ttls = dict(DEFAULT_TTLS)
+    ttls.update(getattr(Config, 'IGDB_CACHE_TTLS', {}))
+    return ttls.get(name, getattr(Config, 'IGDB_CACHE_DEFAULT_TTL', 86400))
+
+
+def cache_enabled():
+    return getattr(Config, 'IGDB_CACHE_ENABLED', True)
+
+
+# Reads and writes use their own engine connections, so a cache write never commits
+# or rolls back the scan's pending work in db.session.
+
+def get_cached_response(endpoint, query):
+    """
+    Returns the cached response for the query, or None on a miss or expired entry.
+    """
+    key = make_cache_key(endpoint, query)
+    table = IGDBCacheEntry.__table__
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        row = connection.execute(
+            select(table.c.response).where(table.c.cache_key == key, table.c.expires_at > now)
+        ).first()
+        if row is None:
+            _count('misses')
+            return None
+        connection.execute(update(table).where(table.c.cache_key == key).values(last_accessed=now))
+    _count('hits')
+    return row.response
+
+
+def store_response(endpoint, query, response):
+    ttl = endpoint_ttl(endpoint)
+    if ttl <= 0:
+        return
+    table = IGDBCacheEntry.__table__
+    now = datetime.utcnow()
+    values = {
+        'cache_key': make_cache_key(endpoint, query),
+        'endpoint': endpoint,
+        'response': response,
+        'created_at': now,
+        'expires_at': now + timedelta(seconds=ttl),
+        'last_accessed': now,
+    }
+    statement = insert(table).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.cache_key],
+        set_={column: statement.excluded[column] for column in ('endpoint', 'response', 'created_at', 'expires_at', 'last_accessed')}
+    )
+    with db.engine.begin() as connection:
+        connection.execute(statement)
+
+    with _stats_lock:
+        _stats['stores'] += 1
+        run_eviction = _stats['stores'] % EVICTION_INTERVAL == 0
+    if run_eviction:
+        evict_entries()
+
+
+def evict_entries():
+    """
+    Drops expired entries, then the least recently used ones above IGDB_CACHE_MAX_ENTRIES.
+    """
+    max_entries = getattr(Config, 'IGDB_CACHE_MAX_ENTRIES', 20000)
+    table = IGDBCacheEntry.__table__
+    with db.engine.begin() as connection:
+        removed = connection.execute(delete(table).where(table.c.expires_at <= datetime.utcnow())).rowcount
+        overflow = select(table.c.cache_key).order_by(table.c.last_accessed.desc()).offset(max_entries)
+        removed += connection.execute(delete(table).where(table.c.cache_key.in_(overflow))).rowcount
+    if removed:
+        _count('evictions', removed)
+        print(f"IGDB cache evicted {removed} entries")
+
+
+def purge_cache():
+    """
+    Removes all cached responses and known misses. Returns the number of rows removed.
+    """
+    with db.engine.begin() as connection:
+        removed = connection.execute(delete(IGDBCacheEntry.__table__)).rowcount
+        removed += connection.execute(delete(IGDBNegativeMatch.__table__)).rowcount
+    print(f"IGDB cache purged, {removed} entries removed")
+    return removed
+
+
+def _negative_key(game_name, platform):
+    return re.sub(r'\s+', ' ', game_name).strip().lower()[:255], platform or 'OTHER'
+
+
+def is_known_miss(game_name, platform):
+    """
+    True if IGDB found no match for this cleaned name on this platform within the last
+    IGDB_NEGATIVE_CACHE_DAYS days.
+    """
+    if getattr(Config, 'IGDB_NEGATIVE_CACHE_DAYS', 14) <= 0:
+        return False
+    name, platform = _negative_key(game_name, platform)
+    table = IGDBNegativeMatch.__table__
+    with db.engine.connect() as connection:
+        row = connection.execute(
+            select(table.c.id).where(table.c.name == name, table.c.platform == platform,
+                                     table.c.expires_at > datetime.utcnow())
+        ).first()
+    return row is not None
+
+
+def known_misses(game_names, platform):
+    """
+    The names among game_names that is_known_miss would report, looked up in one query.
+    """
+    game_names = list(dict.fromkeys(game_names))
+    if not game_names or getattr(Config, 'IGDB_NEGATIVE_CACHE_DAYS', 14) <= 0:
+        return set()
+    keys = {}
+    for game_name in game_names:
+        name, platform_key = _negative_key(game_name, platform)
+        keys.setdefault(name, []).append(game_name)
+    table = IGDBNegativeMatch.__table__
+    with db.engine.connect() as connection:
+        rows = connection.execute(
+            select(table.c.name).where(table.c.name.in_(list(keys)), table.c.platform == platform_key,
+                                       table.c.expires_at > datetime.utcnow())
+        )
+        return {game_name for (name,) in rows for game_name in keys[name]}
+
+
+def record_miss(game_name, platform):
+    days = getattr(Config, 'IGDB_NEGATIVE_CACHE_DAYS', 14)
+    if days <= 0:
+        return
+    name, platform = _negative_key(game_name, platform)
+    table = IGDBNegativeMatch.__table__
+    now = datetime.utcnow()
+    statement = insert(table).values(name=name, platform=platform, created_at=now,
+                                     expires_at=now + timedelta(days=days))
+    statement = statement.on_conflict_do_update(
+        constraint='uq_igdb_negative_match',
+        set_={'created_at': statement.excluded.created_at, 'expires_at': statement.excluded.expires_at}
+    )
+    with db.engine.begin() as connection:
+        connection.execute(statement)
+
+
+def get_cache_stats():
+    table = IGDBCacheEntry.__table__
+    with db.engine.connect() as connection:
+        entries = connection.execute(select(func.count()).select_from(table)).scalar()
+        known_misses = connection.execute(
+            select(func.count()).select_from(IGDBNegativeMatch.__table__)
+            .where(IGDBNegativeMatch.__table__.c.expires_at > datetime.utcnow())
+        ).scalar()
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['known_misses'] = known_misses
+    lookups = stats['hits'] + stats['misses']
+    stats['entries'] = entries
+    stats['max_entries'] = getattr(Config, 'IGDB_CACHE_MAX_ENTRIES', 20000)
+    stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    return stats
@@ -0,0 +1,210 @@
+# File: /modules/igdb_catalog.py
+# Offline IGDB catalog: a local SQLite trigram index of game names built from an IGDB dump,
+# used to resolve IGDB ids without a live search
+
+import os, re, json, sqlite3, threading, difflib
+from functools import lru_cache
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (id INTEGER PRIMARY KEY, name TEXT NOT NULL, cover_image_id TEXT);
+CREATE TABLE IF NOT EXISTS names (id INTEGER PRIMARY KEY, game_id INTEGER NOT NULL, normalized TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS platforms (game_id INTEGER NOT NULL, platform_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS trigrams (trigram TEXT NOT NULL, name_id INTEGER NOT NULL);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_names_normalized ON names (normalized);
+CREATE INDEX IF NOT EXISTS idx_platforms_game ON platforms (game_id, platform_id);
+CREATE INDEX IF NOT EXISTS idx_trigrams_trigram ON trigrams (trigram, name_id);
+"""
+
+# Candidate names pulled from the trigram index before scoring
+CANDIDATE_LIMIT = 50
+
+
+def catalog_path():
+    return getattr(Config, 'IGDB_CATALOG_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'igdb_catalog.sqlite'))
+
+
+def normalize_name(name):
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name.lower()).split())
+
+
+def name_trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else []
+
+
+def import_catalog(dump_path, index_path=None):
+    """
+    Builds the catalog index from a JSON lines dump with one IGDB game per line, e.g.
+    {"id": 1942, "name": "The Witcher 3: Wild Hunt", "alternative_names": [{"name": "Witcher 3"}],
+     "platforms": [6, 48], "cover": {"image_id": "co1wyy"}}
+    Alternative names and platforms may be plain values or expanded objects. The index is
+    written next to the target path and swapped in when complete.
+
+    Returns:
+        int: the number of games imported.
+    """
+    index_path = index_path or catalog_path()
+    temp_path = index_path + '.tmp'
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    connection = sqlite3.connect(temp_path)
+    connection.executescript(SCHEMA)
+    imported = 0
+    name_id = 0
+    with open(dump_path, 'r', encoding='utf-8') as dump:
+        for line in dump:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                game = json.loads(line)
+                game_id = int(game['id'])
+                game_name = game['name']
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"Skipping invalid catalog line: {e}")
+                continue
+
+            cover = game.get('cover')
+            cover_image_id = cover.get('image_id') if isinstance(cover, dict) else game.get('cover_image_id')
+            connection.execute("INSERT OR REPLACE INTO games (id, name, cover_image_id) VALUES (?, ?, ?)",
+                               (game_id, game_name, cover_image_id))
+
+            platform_ids = [p.get('id') if isinstance(p, dict) else p for p in _as_list(game.get('platforms'))]
+            connection.executemany("INSERT INTO platforms (game_id, platform_id) VALUES (?, ?)",
+                                   [(game_id, int(p)) for p in platform_ids if p is not None])
+
+            names = [game_name] + [n.get('name') if isinstance(n, dict) else n for n in _as_list(game.get('alternative_names'))]
+            for normalized in {normalize_name(n) for n in names if n}:
+                if not normalized:
+                    continue
+                name_id += 1
+                connection.execute("INSERT INTO names (id, game_id, normalized) VALUES (?, ?, ?)",
+                                   (name_id, game_id, normalized))
+                connection.executemany("INSERT INTO trigrams (trigram, name_id) VALUES (?, ?)",
+                                       [(trigram, name_id) for trigram in name_trigrams(normalized)])
+
+            imported += 1
+            if imported % 10000 == 0:
+                connection.commit()
+                print(f"Imported {imported} catalog games")
+
+    connection.commit()
+    connection.executescript(INDEXES)
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+    os.replace(temp_path, index_path)
+    print(f"IGDB catalog index written to {index_path} with {imported} games")
+    return imported
+
+
+class IGDBCatalog:
+    """
+    Read-only access to the catalog index. Each thread gets its own SQLite connection, and
+    lookups are memoized since scans resolve the same cleaned names repeatedly.
+    """
+    _local = threading.local()
+    _generation = 0
+    _mtime = None
+
+    @classmethod
+    def reset(cls):
+        # Connections opened before a re-import point at the replaced file
+        cls._generation += 1
+        _cached_lookup.cache_clear()
+
+    @classmethod
+    def available(cls):
+        """
+        True if the catalog is enabled and its index exists. Notices when the import script
+        has replaced the index since the last lookup.
+        """
+        if not getattr(Config, 'IGDB_CATALOG_ENABLED', True):
+            return False
+        try:
+            mtime = os.stat(catalog_path()).st_mtime
+        except OSError:
+            return False
+        if mtime != cls._mtime:
+            cls._mtime = mtime
+            cls.reset()
+        return True
+
+    @classmethod
+    def connection(cls):
+        if getattr(cls._local, 'generation', None) != cls._generation:
+            cls._local.connection = sqlite3.connect(f"file:{catalog_path()}?mode=ro", uri=True)
+            cls._local.generation = cls._generation
+        return cls._local.connection
+
+    @staticmethod
+    def _best_match(connection, normalized, platform_id, rows):
+        best = None
+        for game_id, candidate in rows:
+            if platform_id is not None and connection.execute(
+                    "SELECT 1 FROM platforms WHERE game_id = ? AND platform_id = ?", (game_id, platform_id)).fetchone() is None:
+                continue
+            score = difflib.SequenceMatcher(None, normalized, candidate).ratio()
+            if best is None or score > best[1]:
+                best = (game_id, score)
+        return best
+
+    @classmethod
+    def lookup(cls, game_name, platform_id=None):
+        normalized = normalize_name(game_name)
+        if not normalized:
+            return None
+        connection = cls.connection()
+
+        best = cls._best_match(connection, normalized, platform_id, connection.execute(
+            "SELECT game_id, normalized FROM names WHERE normalized = ?", (normalized,)
+        ).fetchall())
+        if best is None:
+            trigrams = list(name_trigrams(normalized))
+            placeholders = ','.join('?' * len(trigrams))
+            best = cls._best_match(connection, normalized, platform_id, connection.execute(
+                f"""SELECT names.game_id, names.normalized FROM names
+                    JOIN (SELECT name_id, COUNT(*) AS shared FROM trigrams WHERE trigram IN ({placeholders})
+                          GROUP BY name_id ORDER BY shared DESC LIMIT ?) AS candidates
+                    ON candidates.name_id = names.id""",
+                trigrams + [CANDIDATE_LIMIT]
+            ).fetchall())
+
+        if best is None or best[1] < getattr(Config, 'IGDB_CATALOG_MIN_SCORE', 0.85):
+            return None
+        game_id, score = best
+        name, cover_image_id = connection.execute(
+            "SELECT name, cover_image_id FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        return {'id': game_id, 'name': name, 'cover_image_id': cover_image_id, 'score': round(score, 3)}
+
+
+@lru_cache(maxsize=4096)
+def _cached_lookup(game_name, platform_id):
+    return IGDBCatalog.lookup(game_name, platform_id)
+
+
+def lookup_catalog_game(game_name, platform_id=None):
+    """
+    Resolves a cleaned game name to an IGDB game from the offline catalog.
+
+    Returns:
+        dict with id, name, cover_image_id and match score, or None if there is no catalog,
+        no match on the platform, or the best match scores below IGDB_CATALOG_MIN_SCORE.
+    """
+    if not IGDBCatalog.available():
+        return None
+    try:
+        return _cached_lookup(game_name, platform_id)
+    except sqlite3.Error as e:
+        print(f"IGDB catalog lookup failed for {game_name}: {e}")
+        return None
@@ -0,0 +1,82 @@
+# File: /modules/igdb_fixtures.py
+# Record/replay of IGDB and image CDN responses, so scans can be benchmarked and tested offline
+# against igdb_fixture_server.py
+
+import os, json, hashlib, tempfile
+from urllib.parse import urlparse
+from config import Config
+
+IMAGE_HOST = 'images.igdb.com'
+
+
+def fixture_key(method, url, body=None):
+    """
+    Identifies a recorded response by method, URL path and whitespace-normalized body. The host
+    is left out so responses recorded from IGDB replay unchanged from the local server.
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    normalized_body = ' '.join((body or '').split())
+    return hashlib.sha256(f"{method.upper()} {urlparse(url).path}\n{normalized_body}".encode('utf-8')).hexdigest()
+
+
+def recording_dir():
+    return getattr(Config, 'IGDB_FIXTURE_RECORD_DIR', '')
+
+
+def should_record(url):
+    # Only IGDB API and image traffic is recorded, never the token exchange or Discord
+    if not recording_dir():
+        return False
+    hosts = {urlparse(Config.IGDB_API_ENDPOINT).netloc.lower(), IMAGE_HOST}
+    image_base_url = getattr(Config, 'IGDB_IMAGE_BASE_URL', '')
+    if image_base_url:
+        hosts.add(urlparse(image_base_url).netloc.lower())
+    return urlparse(url).netloc.lower() in hosts
+
+
+def _write_atomic(path, data):
+    directory = os.path.dirname(path)
+    handle, temp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(handle, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def record_response(method, url, body, response):
+    """
+    Saves a response into IGDB_FIXTURE_RECORD_DIR as <key>.json (request and response
+    metadata) and <key>.body (raw content).
+    """
+    directory = recording_dir()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        key = fixture_key(method, url, body)
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', 'replace')
+        meta = {
+            'method': method.upper(),
+            'url': url,
+            'body': body or '',
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', 'application/octet-stream'),
+        }
+        _write_atomic(os.path.join(directory, key + '.body'), response.content)
+        _write_atomic(os.path.join(directory, key + '.json'), json.dumps(meta, indent=2).encode('utf-8'))
+    except OSError as e:
+        print(f"Failed to record fixture for {url}: {e}")
+
+
+def load_fixture(directory, method, url, body=None):
+    """
+    Returns (meta, content) of the recorded response for the request, or None if none exists.
+    """
+    key = fixture_key(method, url, body)
+    meta_path = os.path.join(directory, key + '.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    with open(os.path.join(directory, key + '.body'), 'rb') as f:
+        content = f.read()
+    return meta, content
@@ -19,6 +19,7 @@ ph = PasswordHasher()
 
 class JSONEncodedDict(TypeDecorator):
     impl = TEXT
+    cache_ok = True
 
     def process_bind_param(self, value, dialect):
         if value is not None:
@@ -157,6 +158,7 @@ class Library(db.Model):
     platform = db.Column(db.Enum(LibraryPlatform), nullable=False)
     games = db.relationship('Game', backref='library', lazy=True)
     unmatched_folders = relationship("UnmatchedFolder", backref='library', cascade="all, delete-orphan")
+    scan_concurrency = db.Column(db.Integer, nullable=True)  # Parallel scan workers, SCAN_WORKERS if not set
 
 
 
@@ -497,6 +499,44 @@ class ScanJob(db.Model):
     folders_failed = db.Column(db.Integer, default=0)
     library_uuid = db.Column(db.String(36), db.ForeignKey('libraries.uuid'), nullable=True)
     library = db.relationship('Library', backref=db.backref('scan_jobs', lazy=True))
+    scan_mode = db.Column(db.String(10), default='folders')
+
+
+class ScanJobItem(db.Model):
+    # Work list of a running scan job, kept so an interrupted job can resume where it stopped
+    __tablename__ = 'scan_job_items'
+    id = db.Column(db.Integer, primary_key=True)
+    scan_job_id = db.Column(db.String(36), db.ForeignKey('scan_jobs.id', ondelete='CASCADE'), nullable=False, index=True)
+    full_path = db.Column(db.String, nullable=False)
+    state = db.Column(db.Enum('Pending', 'Matched', 'Unmatched', 'Failed', name='scan_job_item_state_enum'), default='Pending', nullable=False)
+    __table_args__ = (db.UniqueConstraint('scan_job_id', 'full_path', name='uq_scan_job_item'),)
+
+
+class FolderSnapshotEntry(db.Model):
+    # State of a scan root entry when a scan last processed it, so unchanged entries are skipped
+    __tablename__ = 'folder_snapshots'
+    id = db.Column(db.Integer, primary_key=True)
+    library_uuid = db.Column(db.String(36), db.ForeignKey('libraries.uuid', ondelete='CASCADE'), nullable=False)
+    scan_root = db.Column(db.String, nullable=False, index=True)
+    path = db.Column(db.String, nullable=False)
+    inode = db.Column(db.BigInteger)
+    mtime = db.Column(db.Float)
+    entry_count = db.Column(db.Integer)
+    updates_mtime = db.Column(db.Float)  # mtime of the game's updates folder, None if it has none
+    scanned_at = db.Column(db.Float)  # time.time() when the entry was looked at
+    __table_args__ = (db.UniqueConstraint('library_uuid', 'path', name='uq_folder_snapshot_path'),)
+
+
+class DirectorySize(db.Model):
+    # A directory's own files and subdirectories as of its last listing, so sizes only re-list changed directories
+    __tablename__ = 'directory_sizes'
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String, nullable=False, unique=True)
+    mtime = db.Column(db.Float)
+    listed_at = db.Column(db.Float)  # time.time() when the directory was listed
+    files_size = db.Column(db.BigInteger)  # Files directly in the directory
+    subdirs = db.Column(JSONEncodedDict)  # Names of its subdirectories
+    __table_args__ = (db.Index('ix_directory_sizes_path_prefix', 'path', postgresql_ops={'path': 'text_pattern_ops'}),)
 
 
 class UnmatchedFolder(db.Model):
@@ -509,6 +549,26 @@ class UnmatchedFolder(db.Model):
     content_type = db.Column(db.Enum('Games', name='unmatched_folder_content_type_enum'))
     status = db.Column(db.Enum('Pending', 'Ignore', 'Duplicate', 'Unmatched', name='unmatched_folder_status_enum'))
 
+
+class IGDBCacheEntry(db.Model):
+    __tablename__ = 'igdb_cache'
+    cache_key = db.Column(db.String(64), primary_key=True)  # sha256 of endpoint + normalized query
+    endpoint = db.Column(db.String(255), nullable=False)
+    response = db.Column(JSONEncodedDict)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_accessed = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class IGDBNegativeMatch(db.Model):
+    __tablename__ = 'igdb_negative_matches'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)  # cleaned game name, lowercased
+    platform = db.Column(db.String(50), nullable=False)  # LibraryPlatform name the search was filtered on
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    __table_args__ = (db.UniqueConstraint('name', 'platform', name='uq_igdb_negative_match'),)
+
     
 
 class UserPreference(db.Model):
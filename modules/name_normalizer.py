@@ -0,0 +1,212 @@
+# File: /modules/name_normalizer.py
+# Turns folder and file names into game names for IGDB searches. Release group patterns are
+# compiled into single alternations, rebuilt when ReleaseGroup rows change, and results are
+# cached per filename.
+
+import re, threading
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from modules.models import ReleaseGroup
+
+VERSION_PATTERN = re.compile(r'v\d+(\.\d+)*')
+STANDALONE_VERSION_PATTERN = re.compile(r'\b\d+(\.\d+)+\b')
+LETTER_DOT_PATTERN = re.compile(r'(?<=\b[A-Z])\.(?=[A-Z]\b|\s|$)')
+SEPARATOR_PATTERN = re.compile(r'(?<!^)(?<![\d])\.|_')
+VERSION_NUMBER_PATTERN = re.compile(r'\bv?\d+(\.\d+){1,3}')
+NUMERAL_PATTERN = re.compile(r'\b([IVXLCDM]+|[0-9]+)(?:[^\w]|$)')
+BUILD_PATTERN = re.compile(r'Build\.\d+')
+DLC_PATTERN = re.compile(r'(\+|\-)\d+DLCs?', re.IGNORECASE)
+EDITION_PATTERN = re.compile(r'Repack|Edition|Remastered|Remake|Proper|Dodi', re.IGNORECASE)
+TRAILING_NUMBER_PATTERN = re.compile(r'\(\d+\)$')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Batches at least this large are normalized on a process pool
+POOL_THRESHOLD = 5000
+# Filenames remembered per normalizer before the cache is cleared
+CACHE_SIZE = 100000
+
+
+def release_group_patterns(release_groups):
+    """
+    Builds the (insensitive, sensitive) pattern lists from (rlsgroup, rlsgroupcs) pairs.
+    """
+    release_groups = list(release_groups)
+    # Fetching insensitive patterns (not case-sensitive)
+    insensitive_patterns = [
+        "-" + rlsgroup for rlsgroup, _ in release_groups if rlsgroup is not None
+    ] + [
+        "." + rlsgroup for rlsgroup, _ in release_groups if rlsgroup is not None
+    ]
+
+    # Initializing list for sensitive patterns (case-sensitive)
+    sensitive_patterns = []
+    for rlsgroup, rlsgroupcs in release_groups:
+        if rlsgroupcs is None or rlsgroupcs.lower() not in ('yes', 'no'):
+            continue
+        is_case_sensitive = rlsgroupcs.lower() == 'yes'
+        sensitive_patterns.append(("-" + rlsgroup, is_case_sensitive))
+        sensitive_patterns.append(("." + rlsgroup, is_case_sensitive))
+    return insensitive_patterns, sensitive_patterns
+
+
+def load_release_group_patterns():
+    try:
+        return release_group_patterns((rg.rlsgroup, rg.rlsgroupcs) for rg in ReleaseGroup.query.all())
+    except SQLAlchemyError as e:
+        print(f"An error occurred while fetching release group patterns: {e}")
+        return [], []
+
+
+def compile_alternation(patterns, flags=0):
+    """
+    One regex matching any of the literal patterns as a whole word. Longer patterns come first
+    so e.g. -FitGirl.Repack wins over -FitGirl.
+    """
+    patterns = sorted(set(patterns), key=lambda pattern: (-len(pattern), pattern))
+    if not patterns:
+        return None
+    return re.compile(r"\b(?:" + '|'.join(re.escape(pattern) for pattern in patterns) + r")\b", flags)
+
+
+def compile_release_groups(insensitive_patterns, sensitive_patterns):
+    """
+    Compiles the patterns returned by load_release_group_patterns into at most two regexes:
+    everything matched case-insensitively first, then the case-sensitive groups.
+    """
+    insensitive = list(insensitive_patterns) + [pattern for pattern, is_case_sensitive in sensitive_patterns if not is_case_sensitive]
+    sensitive = [pattern for pattern, is_case_sensitive in sensitive_patterns if is_case_sensitive]
+    return [regex for regex in (compile_alternation(insensitive, re.IGNORECASE), compile_alternation(sensitive)) if regex]
+
+
+def normalize_name(filename, release_group_regexes):
+    # Check and remove 'setup' at the start, case-insensitive
+    if filename.lower().startswith('setup'):
+        filename = filename[len('setup'):].lstrip("_").lstrip("-").lstrip()
+
+    # First handle version numbers and known patterns that should be removed
+    filename = VERSION_PATTERN.sub('', filename)  # Remove version numbers like v1.0.3
+    filename = STANDALONE_VERSION_PATTERN.sub('', filename)  # Remove standalone version numbers like 1.0.3
+
+    # Handle dots between single letters (like A.Tale -> A Tale)
+    filename = LETTER_DOT_PATTERN.sub(' ', filename)
+
+    # Replace remaining dots and underscores with spaces, but preserve dots in known patterns
+    filename = SEPARATOR_PATTERN.sub(' ', filename)
+
+    # Remove version numbers
+    filename = VERSION_NUMBER_PATTERN.sub('', filename)
+
+    # Remove known release group patterns
+    for regex in release_group_regexes:
+        filename = regex.sub('', filename)
+
+    # Handle cases with numerals and versions
+    filename = NUMERAL_PATTERN.sub(r' \1 ', filename)
+
+    # Cleanup for versions, DLCs, etc.
+    filename = BUILD_PATTERN.sub('', filename)
+    filename = DLC_PATTERN.sub('', filename)
+    filename = EDITION_PATTERN.sub('', filename)
+
+    # Remove trailing numbers enclosed in brackets
+    filename = TRAILING_NUMBER_PATTERN.sub('', filename).strip()
+
+    # Normalize whitespace and re-title
+    filename = WHITESPACE_PATTERN.sub(' ', filename).strip()
+    return ' '.join(filename.split()).title()
+
+
+_pool_regexes = None
+
+
+def _init_pool_worker(insensitive_patterns, sensitive_patterns):
+    global _pool_regexes
+    _pool_regexes = compile_release_groups(insensitive_patterns, sensitive_patterns)
+
+
+def _normalize_in_pool(filenames):
+    return [normalize_name(filename, _pool_regexes) for filename in filenames]
+
+
+class NameNormalizer:
+    """
+    Cleans names with release group patterns compiled once, remembering the result for each
+    filename seen.
+    """
+    def __init__(self, insensitive_patterns, sensitive_patterns, generation=None):
+        self.insensitive_patterns = list(insensitive_patterns)
+        self.sensitive_patterns = list(sensitive_patterns)
+        self.generation = generation
+        self.regexes = compile_release_groups(self.insensitive_patterns, self.sensitive_patterns)
+        self.cache = {}
+
+    def clean(self, filename):
+        cleaned = self.cache.get(filename)
+        if cleaned is None:
+            cleaned = normalize_name(filename, self.regexes)
+            if len(self.cache) >= CACHE_SIZE:
+                self.cache.clear()
+            self.cache[filename] = cleaned
+        return cleaned
+
+    def clean_many(self, filenames, processes=None):
+        """
+        Cleans a list of names, spreading the ones not cached yet over a process pool when there
+        are at least POOL_THRESHOLD of them.
+        """
+        missing = list(dict.fromkeys(filename for filename in filenames if filename not in self.cache))
+        if len(missing) >= POOL_THRESHOLD:
+            chunk_size = 1000
+            chunks = [missing[i:i + chunk_size] for i in range(0, len(missing), chunk_size)]
+            try:
+                with ProcessPoolExecutor(max_workers=processes, initializer=_init_pool_worker,
+                                         initargs=(self.insensitive_patterns, self.sensitive_patterns)) as pool:
+                    for chunk, results in zip(chunks, pool.map(_normalize_in_pool, chunks)):
+                        self.cache.update(zip(chunk, results))
+            except (OSError, RuntimeError) as e:
+                print(f"Name normalization process pool unavailable, continuing in this process: {e}")
+        return [self.clean(filename) for filename in filenames]
+
+
+_lock = threading.Lock()
+_generation = 0
+_normalizer = None
+_pattern_normalizers = {}
+
+
+def _release_groups_changed(*args):
+    global _generation
+    _generation += 1
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(ReleaseGroup, _event_name, _release_groups_changed)
+
+
+def get_name_normalizer():
+    """
+    The normalizer for the release groups in the database, rebuilt after ReleaseGroup rows were
+    added, changed or deleted.
+    """
+    global _normalizer
+    with _lock:
+        if _normalizer is None or _normalizer.generation != _generation:
+            generation = _generation
+            insensitive_patterns, sensitive_patterns = load_release_group_patterns()
+            _normalizer = NameNormalizer(insensitive_patterns, sensitive_patterns, generation)
+        return _normalizer
+
+
+def normalizer_for_patterns(insensitive_patterns, sensitive_patterns):
+    """
+    A normalizer for explicitly given patterns, reused while callers keep passing the same ones.
+    """
+    key = (tuple(insensitive_patterns), tuple(sensitive_patterns))
+    with _lock:
+        normalizer = _pattern_normalizers.get(key)
+        if normalizer is None:
+            if len(_pattern_normalizers) >= 8:
+                _pattern_normalizers.clear()
+            normalizer = _pattern_normalizers[key] = NameNormalizer(insensitive_patterns, sensitive_patterns)
+        return normalizer
@@ -16,7 +16,6 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy import func, Integer, Text, case
 from werkzeug.urls import url_parse
 from werkzeug.utils import secure_filename
-from glob import glob
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from modules import db, mail, cache
@@ -46,11 +45,16 @@ from modules.models import (
 )
 from modules.utilities import (
     admin_required, _authenticate_and_redirect, square_image, refresh_images_in_background, send_email, send_password_reset_email,
-    get_game_by_uuid, make_igdb_api_request, load_release_group_patterns, check_existing_game_by_igdb_id,
+    get_game_by_uuid, make_igdb_api_request, check_existing_game_by_igdb_id,
     get_game_names_from_folder, get_cover_thumbnail_url, scan_and_add_games, get_game_names_from_files,
-    zip_game, zip_folder, format_size, delete_game_images, read_first_nfo_content, get_folder_size_in_bytes, get_folder_size_in_bytes_updates, PLATFORM_IDS
+    zip_game, zip_folder, format_size, delete_game_images, read_first_nfo_content, get_folder_size_in_bytes, inspect_game_folder, PLATFORM_IDS
 )
 from modules.theme_manager import ThemeManager
+from modules.igdb_api import rate_limiter, igdb_priority, igdb_circuit_breaker, igdb_endpoint, PRIORITY_BULK
+from modules.igdb_cache import get_cache_stats, purge_cache
+from modules.scan_jobs import cancel_running_scan, running_scan_progress, library_scan_running
+from modules.folder_inspector import inspect_folder
+from modules.name_normalizer import load_release_group_patterns
 
 
 bp = Blueprint('main', __name__)
@@ -1043,9 +1047,29 @@ def api_debug():
         selected_endpoint = form.endpoint.data
         query_params = form.query.data
         print(f"Selected endpoint: {selected_endpoint} with query params: {query_params}")
-        api_response = make_igdb_api_request(selected_endpoint, query_params)
-        
-    return render_template('admin/admin_debug_api.html', form=form, api_response=api_response)
+        # Always hit IGDB live here, the debugger is for checking what IGDB returns right now
+        api_response = make_igdb_api_request(selected_endpoint, query_params, use_cache=False)
+
+    try:
+        cache_stats = get_cache_stats()
+    except SQLAlchemyError as e:
+        print(f"Failed to read IGDB cache stats: {e}")
+        cache_stats = None
+    return render_template('admin/admin_debug_api.html', form=form, api_response=api_response, cache_stats=cache_stats)
+
+
+@bp.route('/admin/igdb_cache/purge', methods=['POST'])
+@login_required
+@admin_required
+def purge_igdb_cache():
+    try:
+        removed = purge_cache()
+        flash(f'IGDB cache purged, {removed} cached responses removed.', 'success')
+    except SQLAlchemyError as e:
+        error_message = f"Database error while purging the IGDB cache: {str(e)}"
+        print(error_message)
+        flash(error_message, 'error')
+    return redirect(url_for('main.api_debug'))
 
 
 @bp.route('/scan_management', methods=['GET', 'POST'])
@@ -1120,9 +1144,8 @@ def handle_auto_scan(auto_form):
     if auto_form.validate_on_submit():
         library_uuid = auto_form.library_uuid.data
         
-        running_job = ScanJob.query.filter_by(status='Running').first()
-        if running_job:
-            flash('A scan is already in progress. Please wait until the current scan completes.', 'error')
+        if is_scan_job_running(library_uuid):
+            flash('A scan of this library is already in progress. Please wait until it completes.', 'error')
             session['active_tab'] = 'auto'
             return redirect(url_for('main.scan_management', library_uuid=library_uuid, active_tab='auto'))
 
@@ -1136,8 +1159,9 @@ def handle_auto_scan(auto_form):
         folder_path = auto_form.folder_path.data
         
         scan_mode = auto_form.scan_mode.data
+        schedule = auto_form.schedule.data or None
         
-        print(f"Auto-scan form submitted. Library: {library.name}, Folder: {folder_path}, Scan mode: {scan_mode}")
+        print(f"Auto-scan form submitted. Library: {library.name}, Folder: {folder_path}, Scan mode: {scan_mode}, Schedule: {schedule}")
         # Prepend the base path
         base_dir = current_app.config.get('BASE_FOLDER_WINDOWS') if os.name == 'nt' else current_app.config.get('BASE_FOLDER_POSIX')
         full_path = os.path.join(base_dir, folder_path)
@@ -1149,7 +1173,9 @@ def handle_auto_scan(auto_form):
 
         @copy_current_request_context
         def start_scan():
-            scan_and_add_games(full_path, scan_mode, library_uuid)
+            # Scan traffic uses the bulk IGDB lane so admin lookups are not stuck behind it
+            with igdb_priority(PRIORITY_BULK):
+                scan_and_add_games(full_path, scan_mode, library_uuid, schedule=schedule)
 
         thread = Thread(target=start_scan)
         thread.start()
@@ -1171,6 +1197,8 @@ def cancel_scan_job(job_id):
     if job and job.status == 'Running':
         job.is_enabled = False
         db.session.commit()
+        # Scans in this process stop right away, others once they see is_enabled
+        cancel_running_scan(job_id)
         flash(f"Scan job {job_id} has been canceled.")
         print(f"Scan job {job_id} has been canceled.")
     else:
@@ -1184,9 +1212,8 @@ def handle_manual_scan(manual_form):
     session['active_tab'] = 'manual'
     if manual_form.validate_on_submit():
         # check job status
-        running_job = ScanJob.query.filter_by(status='Running').first()
-        if running_job:
-            flash('A scan is already in progress. Please wait until the current scan completes.', 'error')
+        if is_scan_job_running(manual_form.library_uuid.data):
+            flash('A scan of this library is already in progress. Please wait until it completes.', 'error')
             session['active_tab'] = 'manual'
             return redirect(url_for('main.scan_management', active_tab='manual'))
         
@@ -1233,7 +1260,8 @@ def handle_manual_scan(manual_form):
 @login_required
 @admin_required
 def add_game_manual():
-    if is_scan_job_running():
+    target_library_uuid = request.form.get('library_uuid') or request.args.get('library_uuid') or session.get('selected_library_uuid')
+    if is_scan_job_running(target_library_uuid):
         flash('Cannot add a new game while a scan job is running. Please try again later.', 'error')
         print("Attempt to add a new game while a scan job is running.")
         
@@ -1371,7 +1399,7 @@ def game_edit(game_uuid):
     library_name = game.library.name
     print(f"game_edit1 Platform ID: {platform_id}, Platform Name: {platform_name} Library Name: {library_name}")
     if form.validate_on_submit():
-        if is_scan_job_running():
+        if is_scan_job_running(game.library_uuid) or is_scan_job_running(form.library_uuid.data):
             flash('Cannot edit the game while a scan job is running. Please try again later.', 'error')
             print("Attempt to edit a game while a scan job is running by user:", current_user.name)
             # Re-render the template with the current form data
@@ -1439,13 +1467,13 @@ def game_edit(game_uuid):
         game.platforms = form.platforms.data
         game.player_perspectives = form.player_perspectives.data
         
-        # Updating size
+        # Updating size and NFO
         print(f"Calculating folder size for {game.full_disk_path}.")
-        new_folder_size_bytes = get_folder_size_in_bytes_updates(game.full_disk_path)
-        print(f"New folder size for {game.full_disk_path}: {format_size(new_folder_size_bytes)}")
-        game.size = new_folder_size_bytes
+        inspection = inspect_game_folder(game.full_disk_path)
+        print(f"New folder size for {game.full_disk_path}: {format_size(inspection.size_bytes)}")
+        game.size = inspection.size_bytes
 
-        game.nfo_content = read_first_nfo_content(game.full_disk_path)
+        game.nfo_content = inspection.nfo_content
 
         game.date_identified = datetime.utcnow()
                
@@ -1494,11 +1522,11 @@ def get_platform_by_library(library_uuid):
 @login_required
 @admin_required
 def edit_game_images(game_uuid):
-    if is_scan_job_running():
+    game = Game.query.filter_by(uuid=game_uuid).first_or_404()
+    if is_scan_job_running(game.library_uuid):
         # Inform the user that editing images might not be possible at the moment
         flash('Image editing might be restricted while a scan job is running. Please try again later.', 'warning')
 
-    game = Game.query.filter_by(uuid=game_uuid).first_or_404()
     cover_image = Image.query.filter_by(game_uuid=game_uuid, image_type='cover').first()
     screenshots = Image.query.filter_by(game_uuid=game_uuid, image_type='screenshot').all()
     return render_template('games/game_edit_images.html', game=game, cover_image=cover_image, images=screenshots)
@@ -1509,7 +1537,7 @@ def edit_game_images(game_uuid):
 @admin_required
 def upload_image(game_uuid):
     print(f"Uploading image for game {game_uuid}")
-    if is_scan_job_running():
+    if is_scan_job_running(game_library_uuid(game_uuid)):
         print(f"Attempt to upload image for game UUID: {game_uuid} while scan job is running")
         flash('Cannot upload images while a scan job is running. Please try again later.', 'error')
         return jsonify({'error': 'Cannot upload images while a scan job is running. Please try again later.'}), 403
@@ -1592,10 +1620,6 @@ def upload_image(game_uuid):
 @login_required
 @admin_required
 def delete_image():
-    if is_scan_job_running():
-        print("Attempt to delete image while scan job is running")
-        return jsonify({'error': 'Cannot delete images while a scan job is running. Please try again later.'}), 403
-
     try:
         data = request.get_json()
         if not data or 'image_id' not in data:
@@ -1608,6 +1632,10 @@ def delete_image():
         if not image:
             return jsonify({'error': 'Image not found'}), 404
 
+        if is_scan_job_running(game_library_uuid(image.game_uuid)):
+            print("Attempt to delete image while scan job is running")
+            return jsonify({'error': 'Cannot delete images while a scan job is running. Please try again later.'}), 403
+
         # Delete image file from disk
         image_path = os.path.join(current_app.config['IMAGE_SAVE_PATH'], image.url)
         if os.path.exists(image_path):
@@ -1841,18 +1869,22 @@ def handle_delete_unmatched(all):
 @admin_required
 def scan_jobs_status():
     jobs = ScanJob.query.all()
-    jobs_data = [{
-        'id': job.id,
-        'library_name': job.library.name if job.library else 'No Library Assigned',
-        'folders': job.folders,
-        'status': job.status,
-        'total_folders': job.total_folders,
-        'folders_success': job.folders_success,
-        'folders_failed': job.folders_failed,
-        'error_message': job.error_message,
-        'last_run': job.last_run.strftime('%Y-%m-%d %H:%M:%S') if job.last_run else 'Not Available',
-        'next_run': job.next_run.strftime('%Y-%m-%d %H:%M:%S') if job.next_run else 'Not Scheduled'
-    } for job in jobs]
+    jobs_data = []
+    for job in jobs:
+        # Scans running in this process report progress that is not flushed to the database yet
+        progress = running_scan_progress(job.id) or {}
+        jobs_data.append({
+            'id': job.id,
+            'library_name': job.library.name if job.library else 'No Library Assigned',
+            'folders': job.folders,
+            'status': job.status,
+            'total_folders': progress.get('total_folders', job.total_folders),
+            'folders_success': progress.get('folders_success', job.folders_success),
+            'folders_failed': progress.get('folders_failed', job.folders_failed),
+            'error_message': job.error_message,
+            'last_run': job.last_run.strftime('%Y-%m-%d %H:%M:%S') if job.last_run else 'Not Available',
+            'next_run': job.next_run.strftime('%Y-%m-%d %H:%M:%S') if job.next_run else 'Not Scheduled'
+        })
     return jsonify(jobs_data)
 
 @bp.route('/api/unmatched_folders', methods=['GET'])
@@ -2036,14 +2068,19 @@ def game_details(game_uuid):
         
         settings = GlobalSettings.query.first()
         # Only process updates and extras if settings exist and features are enabled
-        if settings:
+        if settings and (settings.enable_game_updates or settings.enable_game_extras):
+            update_folder = settings.update_folder_name or current_app.config['UPDATE_FOLDER_NAME']
+            extras_folder = settings.extras_folder_name or current_app.config['EXTRAS_FOLDER_NAME']
+            # One listing of the game folder covers both
+            inspection = inspect_folder(game.full_disk_path,
+                                        update_folder if settings.enable_game_updates else None,
+                                        extras_folder if settings.enable_game_extras else None,
+                                        measure=False, read_nfo_content=False, list_special=True)
             if settings.enable_game_updates:
-                update_folder = settings.update_folder_name or current_app.config['UPDATE_FOLDER_NAME']
-                update_files = list_files(game.full_disk_path, update_folder)
+                update_files = list_files(game.full_disk_path, update_folder, inspection.updates)
             
             if settings.enable_game_extras:
-                extras_folder = settings.extras_folder_name or current_app.config['EXTRAS_FOLDER_NAME']
-                extras_files = list_files(game.full_disk_path, extras_folder)
+                extras_files = list_files(game.full_disk_path, extras_folder, inspection.extras)
         
         library_uuid = game.library_uuid
         
@@ -2193,22 +2230,28 @@ def inject_current_theme():
 def delete_game_route(game_uuid):
     print(f"Route: /delete_game - {current_user.name} - {current_user.role} method: {request.method} UUID: {game_uuid}")
     
-    if is_scan_job_running():
+    if is_scan_job_running(game_library_uuid(game_uuid)):
         print(f"Error: Attempt to delete game UUID: {game_uuid} while scan job is running")
         flash('Cannot delete the game while a scan job is running. Please try again later.', 'error')
         return redirect(url_for('main.library'))
     delete_game(game_uuid)
     return redirect(url_for('main.library'))
 
-def is_scan_job_running():
+def is_scan_job_running(library_uuid=None):
     """
-    Check if there is any scan job with the status 'Running'.
+    Check if there is any scan job with the status 'Running', only for the given library if
+    one is passed. Scans of other libraries do not block changes to its games.
     
     Returns:
         bool: True if there is a running scan job, False otherwise.
     """
-    running_scan_job = ScanJob.query.filter_by(status='Running').first()
-    return running_scan_job is not None
+    return library_scan_running(library_uuid)
+
+
+def game_library_uuid(game_uuid):
+    # Library of a game, None if the game does not exist
+    game = Game.query.filter_by(uuid=game_uuid).first()
+    return game.library_uuid if game else None
 
 
 def delete_game(game_identifier):
@@ -2306,7 +2349,7 @@ def delete_full_game():
         print(f"Route: /delete_full_game - Game UUID is required.")
         return jsonify({'status': 'error', 'message': 'Game UUID is required.'}), 400
 
-    if is_scan_job_running():
+    if is_scan_job_running(game_library_uuid(game_uuid)):
         print(f"Error: Attempt to delete full game UUID: {game_uuid} while scan job is running")
         return jsonify({'status': 'error', 'message': 'Cannot delete the game while a scan job is running. Please try again later.'}), 403
 
@@ -2452,8 +2495,7 @@ def download_game(game_uuid):
     
     if os.path.isdir(game.full_disk_path):
         # List all files, case-insensitively excluding .NFO and .SFV files, and file_id.diz
-        files_in_directory = [f for f in os.listdir(game.full_disk_path) if os.path.isfile(os.path.join(game.full_disk_path, f))]
-        significant_files = [f for f in files_in_directory if not f.lower().endswith(('.nfo', '.sfv')) and not f.lower() == 'file_id.diz']
+        significant_files = inspect_folder(game.full_disk_path, measure=False, read_nfo_content=False).significant_files
 
         # If more than one significant file remains, expect a zip file
         if len(significant_files) > 1:
@@ -2797,7 +2839,7 @@ def get_company_role():
         print(f"Requested company role for Game IGDB ID: {game_igdb_id} and Company ID: {company_id}")
         
         response_json = make_igdb_api_request(
-            "https://api.igdb.com/v4/involved_companies",
+            igdb_endpoint("involved_companies"),
             f"""fields company.name, developer, publisher, game;
                 where game={game_igdb_id} & id=({company_id});"""
         )
@@ -2858,7 +2900,7 @@ def search_igdb_by_id():
     if not igdb_id:
         return jsonify({"error": "IGDB ID is required"}), 400
 
-    endpoint_url = "https://api.igdb.com/v4/games"
+    endpoint_url = igdb_endpoint("games")
     query_params = f"""
         fields name, summary, cover.url, summary, url, release_dates.date, platforms.name, genres.name, themes.name, game_modes.name, 
                screenshots.url, videos.video_id, first_release_date, aggregated_rating, involved_companies, player_perspectives.name,
@@ -2902,7 +2944,7 @@ def search_igdb_by_name():
 
         query += " limit 10;"  # Set a limit to the number of results
 
-        results = make_igdb_api_request('https://api.igdb.com/v4/games', query)
+        results = make_igdb_api_request(igdb_endpoint('games'), query)
 
         if 'error' not in results:
             return jsonify({'results': results})
@@ -2913,13 +2955,30 @@ def search_igdb_by_name():
 
 
 
+@bp.route('/api/igdb_status', methods=['GET'])
+@login_required
+@admin_required
+def igdb_status():
+    # Exposes the IGDB scheduler queue depth and wait times for throughput tuning
+    try:
+        cache_stats = get_cache_stats()
+    except SQLAlchemyError as e:
+        print(f"Failed to read IGDB cache stats: {e}")
+        cache_stats = None
+    return jsonify({
+        'rate_limiter': rate_limiter.get_stats(),
+        'circuit_breaker': igdb_circuit_breaker().get_state(),
+        'cache': cache_stats
+    })
+
+
+
 @bp.route('/check_scan_status', methods=['GET'])
 @login_required
 @admin_required
 def check_scan_status():
-    active_job = ScanJob.query.filter_by(status='Running').first()
-    
-    is_active = active_job is not None
+    # Any scan, or only scans of ?library_uuid=
+    is_active = is_scan_job_running(request.args.get('library_uuid'))
     return jsonify({"is_active": is_active})
 
 
@@ -2968,6 +3027,7 @@ def add_edit_library(library_uuid=None):
             library = Library(uuid=str(uuid4()))  # Generate a new UUID for new libraries
 
         library.name = form.name.data
+        library.scan_concurrency = form.scan_concurrency.data
         try:
             library.platform = LibraryPlatform[form.platform.data]
         except KeyError:
@@ -3227,21 +3287,18 @@ def verify_file(full_path):
         print(f"Cannot find theme specific file: {full_path}. Using default theme file.", 'warning')
         return False
      
-def list_files(path, folder):
-    if os.name == "nt":
-        content = glob(path + "\\" + folder + '/*');
-    else:
-        content = glob(path + "/" + folder + '/*');
+def list_files(path, folder, entries):
+    # entries: the updates or extras listing of an inspect_folder() of the game folder
     print(f"Listing content of directory {path} and folder {folder}.")
          
     files = {
         "path": path,
         "folder": folder,
         "files": [{
-            'name': os.path.basename(f),
-            'size': format_size(os.path.getsize(f)) if os.path.isfile(f) else format_size(get_folder_size_in_bytes(f)),
-            'isfile': os.path.isfile(f),
-        } for f in content]
+            'name': entry['name'],
+            'size': format_size(entry['size']),
+            'isfile': entry['is_file'],
+        } for entry in entries if not entry['name'].startswith('.')]
     }
       
     print(f"File updates content {files}.")
@@ -0,0 +1,197 @@
+# File: /modules/scan_jobs.py
+# Scan job bookkeeping: when scheduled jobs run next, per-library scan locks, the registry of
+# scans running in this process (cancel flag and live progress), and checkpoints of running
+# jobs (the folders a job has discovered and how far each got), so a job interrupted by a
+# restart continues where it stopped instead of starting over
+
+import threading
+from collections import deque
+from datetime import timedelta
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+from modules import db
+from modules.models import ScanJob, ScanJobItem
+
+# Rows per INSERT/UPDATE statement when saving the work list
+CHUNK_SIZE = 1000
+
+# ScanJob.schedule values
+SCHEDULE_INTERVALS = {
+    '8_hours': timedelta(hours=8),
+    '24_hours': timedelta(hours=24),
+    '48_hours': timedelta(hours=48),
+}
+
+
+def next_scheduled_run(schedule, start):
+    # When a job with the schedule should run again after starting at start, None if unscheduled
+    interval = SCHEDULE_INTERVALS.get(schedule)
+    return start + interval if interval else None
+
+
+def library_scan_running(library_uuid=None, exclude_job_id=None):
+    """
+    True if a scan job of the library is Running, or of any library if none is given.
+    """
+    query = ScanJob.query.filter_by(status='Running')
+    if library_uuid:
+        query = query.filter_by(library_uuid=library_uuid)
+    if exclude_job_id:
+        query = query.filter(ScanJob.id != exclude_job_id)
+    return query.first() is not None
+
+
+_scanning_libraries = set()
+_scanning_libraries_lock = threading.Lock()
+
+
+def claim_library_scan(library_uuid, scan_job_id=None):
+    """
+    Takes the scan lock of a library; scans of different libraries run side by side. Fails if
+    this process is already scanning the library or another process has a Running job for it
+    (other than scan_job_id, the job about to run).
+    """
+    with _scanning_libraries_lock:
+        if library_uuid in _scanning_libraries:
+            return False
+        if library_scan_running(library_uuid, exclude_job_id=scan_job_id):
+            return False
+        _scanning_libraries.add(library_uuid)
+        return True
+
+
+def release_library_scan(library_uuid):
+    with _scanning_libraries_lock:
+        _scanning_libraries.discard(library_uuid)
+
+
+class RunningScan:
+    """
+    A scan running in this process: the event that stops it and its progress as of the last
+    folder, which is ahead of what has been flushed to its ScanJob.
+    """
+    def __init__(self, scan_job_id):
+        self.scan_job_id = scan_job_id
+        self.stop = threading.Event()
+        self.progress = {}
+
+    def update(self, scan_job_entry, total_folders):
+        self.progress = {
+            'total_folders': total_folders,
+            'folders_success': scan_job_entry.folders_success,
+            'folders_failed': scan_job_entry.folders_failed,
+        }
+
+
+_running_scans = {}
+_running_scans_lock = threading.Lock()
+
+
+def start_running_scan(scan_job_id):
+    with _running_scans_lock:
+        running = _running_scans[scan_job_id] = RunningScan(scan_job_id)
+        return running
+
+
+def finish_running_scan(scan_job_id):
+    with _running_scans_lock:
+        _running_scans.pop(scan_job_id, None)
+
+
+def cancel_running_scan(scan_job_id):
+    """
+    Stops a scan running in this process right away. Returns False if it runs elsewhere; such
+    scans notice their ScanJob was disabled the next time they flush progress.
+    """
+    with _running_scans_lock:
+        running = _running_scans.get(scan_job_id)
+    if running is None:
+        return False
+    running.stop.set()
+    return True
+
+
+def running_scan_progress(scan_job_id):
+    # Live progress counters of a scan running in this process, None if it does not run here
+    with _running_scans_lock:
+        running = _running_scans.get(scan_job_id)
+    return dict(running.progress) if running else None
+
+
+class ScanCheckpoint:
+    """
+    The work list of a scan job in scan_job_items. Discovered folders are recorded as Pending
+    and move to Matched, Unmatched or Failed as the scan stores their result. Changes are
+    collected in memory and written by save(), which the scan calls right before it commits
+    its progress, so the work list and the job's counters are committed together.
+
+    The discovery thread only appends to a deque; everything else runs in the scan thread.
+    """
+    def __init__(self, scan_job_id):
+        self.scan_job_id = scan_job_id
+        self.discovered = deque()
+        self.states = {}
+        # Folders whose result was saved since the last pop_saved()
+        self.saved = []
+        # Folders an earlier run of the job already finished
+        self.finished = {path for (path,) in db.session.query(ScanJobItem.full_path).filter(
+            ScanJobItem.scan_job_id == scan_job_id, ScanJobItem.state != 'Pending')}
+
+    def track(self, entries):
+        """
+        Wraps the discovered entries of the scan: finished folders are left out, the others
+        are recorded as Pending.
+        """
+        for item in entries:
+            if item['full_path'] in self.finished:
+                continue
+            self.discovered.append(item['full_path'])
+            yield item
+
+    def set_state(self, full_path, state):
+        self.states[full_path] = state
+
+    def pop_saved(self):
+        # Folders given a result by the saves since the last call
+        saved, self.saved = self.saved, []
+        return saved
+
+    def counts(self):
+        # Folders per state, e.g. {'Matched': 10, 'Unmatched': 2}
+        return dict(db.session.query(ScanJobItem.state, func.count(ScanJobItem.id))
+                    .filter(ScanJobItem.scan_job_id == self.scan_job_id).group_by(ScanJobItem.state))
+
+    def save(self):
+        """
+        Adds newly discovered folders and state changes to the session. The caller commits.
+        """
+        paths = []
+        while self.discovered:
+            paths.append(self.discovered.popleft())
+        for start in range(0, len(paths), CHUNK_SIZE):
+            db.session.execute(
+                insert(ScanJobItem).values([{'scan_job_id': self.scan_job_id, 'full_path': path, 'state': 'Pending'}
+                                            for path in paths[start:start + CHUNK_SIZE]])
+                .on_conflict_do_nothing()
+            )
+
+        states, self.states = self.states, {}
+        self.saved.extend(states)
+        by_state = {}
+        for path, state in states.items():
+            by_state.setdefault(state, []).append(path)
+        for state, state_paths in by_state.items():
+            for start in range(0, len(state_paths), CHUNK_SIZE):
+                db.session.execute(
+                    update(ScanJobItem)
+                    .where(ScanJobItem.scan_job_id == self.scan_job_id,
+                           ScanJobItem.full_path.in_(state_paths[start:start + CHUNK_SIZE]))
+                    .values(state=state)
+                )
+
+    def clear(self):
+        # The work list is only needed while the job can still be resumed
+        self.discovered.clear()
+        self.states = {}
+        self.saved = []
+        ScanJobItem.query.filter_by(scan_job_id=self.scan_job_id).delete()
@@ -0,0 +1,49 @@
+# File: /modules/scan_memory.py
+# Resident memory of the process while a library scan runs, so each scan batch can log its peak
+# and a scan whose memory grows with the library stands out
+
+import os, sys
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes, None where it cannot be read. Falls back to
+    the peak so far where the current value is not available.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes, except on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+
+class ScanMemory:
+    """
+    Peak RSS sampled during the current batch of a scan and during the whole scan.
+    """
+    def __init__(self):
+        self.batch_peak = 0
+        self.scan_peak = 0
+        self.batches = 0
+
+    def sample(self):
+        rss = current_rss()
+        if rss:
+            self.batch_peak = max(self.batch_peak, rss)
+
+    def end_batch(self):
+        # Returns the peak of the batch that just ended
+        self.sample()
+        self.batches += 1
+        peak, self.batch_peak = self.batch_peak, 0
+        self.scan_peak = max(self.scan_peak, peak)
+        return peak
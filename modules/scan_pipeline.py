@@ -0,0 +1,147 @@
+# File: /modules/scan_pipeline.py
+# Streaming library scan: discovery feeds stages of worker threads connected by bounded queues,
+# so folders are matched and stored while the directory is still being listed
+
+import os, queue, threading
+from modules.igdb_api import igdb_priority
+
+# Passed down the queues once a stage has no more items
+STAGE_DONE = object()
+
+
+class ScanItemError:
+    """
+    Stands in for the result of an item whose stage handler raised, so the writer can count
+    the folder as failed. Later stages pass it on untouched; item is always the folder as the
+    failing stage received it, never another ScanItemError.
+    """
+    def __init__(self, item, error):
+        while isinstance(item, ScanItemError):
+            item = item.item
+        self.item = item
+        self.error = error
+
+
+def iter_scan_entries(folder_path, scan_mode='folders', extensions=()):
+    """
+    Lazily yields the entries of a library folder as dicts with the raw 'entry' name to clean
+    and its 'full_path': sub folders in 'folders' mode, files with a supported extension in
+    'files' mode (with 'file_type').
+    """
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            try:
+                if scan_mode == 'folders':
+                    if entry.is_dir():
+                        yield {'entry': entry.name, 'full_path': entry.path}
+                elif entry.is_file() and '.' in entry.name:
+                    extension = entry.name.rsplit('.', 1)[-1].lower()
+                    if extension in extensions:
+                        yield {'entry': entry.name.rsplit('.', 1)[0], 'full_path': entry.path, 'file_type': extension}
+            except OSError as e:
+                print(f"Skipping unreadable entry {entry.path}: {e}")
+
+
+def put_or_stop(target, item, stop):
+    """
+    Puts an item on a bounded queue, giving up if the scan is stopped while the queue is full.
+    """
+    while True:
+        try:
+            target.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            if stop.is_set():
+                return False
+
+
+def run_discovery(entries, outbox, stop, counter):
+    """
+    Feeds entries into the first stage until they run out or the scan is stopped. counter['found']
+    holds the number of entries discovered so far.
+    """
+    try:
+        for item in entries:
+            if stop.is_set() or not put_or_stop(outbox, item, stop):
+                break
+            counter['found'] += 1
+    except OSError as e:
+        print(f"Error while listing scan folder: {e}")
+        counter['error'] = str(e)
+    finally:
+        outbox.put(STAGE_DONE)
+
+
+class ScanStage:
+    """
+    A pool of threads passing batches of items from inbox through handler to outbox. handler
+    takes a list of up to batch_size items and returns a list of results. Items that failed in
+    an earlier stage are passed on without calling the handler. The last worker to finish
+    passes STAGE_DONE on, and a stopped scan is drained without calling the handler so
+    upstream stages never block. after_batch, if given, runs in the worker after each batch.
+    """
+    def __init__(self, name, handler, inbox, outbox, workers=1, batch_size=1, after_batch=None):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.after_batch = after_batch
+        self._active = self.workers
+        self._lock = threading.Lock()
+        self.threads = []
+
+    def start(self, app, priority, stop):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(app, priority, stop),
+                                      name=f"scan-{self.name}-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _next_batch(self):
+        item = self.inbox.get()
+        if item is STAGE_DONE:
+            return None
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is STAGE_DONE:
+                self.inbox.put(STAGE_DONE)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self, app, priority, stop):
+        try:
+            with app.app_context(), igdb_priority(priority):
+                while True:
+                    batch = self._next_batch()
+                    if batch is None:
+                        # Let the other workers of this stage see the end as well
+                        self.inbox.put(STAGE_DONE)
+                        break
+                    if stop.is_set():
+                        continue
+                    results = [item for item in batch if isinstance(item, ScanItemError)]
+                    batch = [item for item in batch if not isinstance(item, ScanItemError)]
+                    if batch:
+                        try:
+                            results += self.handler(batch)
+                        except Exception as e:
+                            print(f"Scan stage {self.name} failed on {len(batch)} items: {e}")
+                            results += [ScanItemError(item, e) for item in batch]
+                        finally:
+                            if self.after_batch:
+                                self.after_batch()
+                    for result in results:
+                        put_or_stop(self.outbox, result, stop)
+        finally:
+            with self._lock:
+                self._active -= 1
+                last = self._active == 0
+            if last:
+                self.outbox.put(STAGE_DONE)
@@ -0,0 +1,85 @@
+# File: /modules/scan_scheduler.py
+# Background scheduler for scan jobs with a schedule ('8_hours', '24_hours', '48_hours'). Due
+# jobs are re-run; the folder snapshot limits each run to entries added or changed since.
+
+import threading
+from datetime import datetime
+from config import Config
+from modules import db
+from modules.models import ScanJob
+from modules.igdb_api import igdb_priority, PRIORITY_BULK
+from modules.scan_jobs import next_scheduled_run, library_scan_running
+from modules.utilities import scan_and_add_games
+
+
+def due_scan_jobs(now):
+    """
+    Scheduled jobs whose next run is due, at most one per library: the one waiting longest.
+    """
+    jobs = ScanJob.query.filter(
+        ScanJob.schedule != None,
+        ScanJob.is_enabled == True,
+        ScanJob.status != 'Running',
+        ScanJob.next_run <= now
+    ).order_by(ScanJob.next_run).all()
+    due = {}
+    for job in jobs:
+        due.setdefault(job.library_uuid, job)
+    return list(due.values())
+
+
+def start_scheduled_scan(scan_job_entry):
+    """
+    Marks a due job Running with its next run, so the scheduler does not pick it up again.
+    Returns the folder to scan, or None if the job cannot run.
+    """
+    folder_path = next(iter(scan_job_entry.folders or {}), None)
+    if not folder_path or not scan_job_entry.library:
+        print(f"Scheduled scan job {scan_job_entry.id} has no folder or library any more, disabling it.")
+        scan_job_entry.is_enabled = False
+        scan_job_entry.status = 'Failed'
+        scan_job_entry.error_message = 'Scheduled scan disabled, its library or folder no longer exists.'
+        db.session.commit()
+        return None
+
+    started = datetime.now()
+    scan_job_entry.status = 'Running'
+    scan_job_entry.last_run = started
+    scan_job_entry.next_run = next_scheduled_run(scan_job_entry.schedule, started)
+    scan_job_entry.error_message = ''
+    scan_job_entry.total_folders = 0
+    scan_job_entry.folders_success = 0
+    scan_job_entry.folders_failed = 0
+    db.session.commit()
+    return folder_path
+
+
+def run_scheduled_scan(app, scan_job_id, folder_path):
+    with app.app_context(), igdb_priority(PRIORITY_BULK):
+        scan_job_entry = ScanJob.query.get(scan_job_id)
+        print(f"Running scheduled scan job {scan_job_id} for {folder_path}")
+        scan_and_add_games(folder_path, scan_job_entry.scan_mode or 'folders', scan_job_entry.library_uuid,
+                           scan_job_entry=scan_job_entry)
+
+
+def run_scan_scheduler(app, stop_event, poll_interval=None):
+    """
+    Checks for due scheduled scans every SCAN_SCHEDULER_INTERVAL seconds until stop_event is
+    set. Each due job runs in its own thread, so libraries are scanned in parallel; a job waits
+    while its library is being scanned.
+    """
+    poll_interval = poll_interval or getattr(Config, 'SCAN_SCHEDULER_INTERVAL', 60)
+    print(f"Scan scheduler started, checking every {poll_interval} seconds.")
+    while not stop_event.wait(poll_interval):
+        with app.app_context():
+            try:
+                for scan_job_entry in due_scan_jobs(datetime.now()):
+                    if library_scan_running(scan_job_entry.library_uuid):
+                        continue
+                    folder_path = start_scheduled_scan(scan_job_entry)
+                    if folder_path:
+                        threading.Thread(target=run_scheduled_scan, args=(app, scan_job_entry.id, folder_path),
+                                         name=f"ScheduledScan-{scan_job_entry.id}", daemon=True).start()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Scan scheduler error: {e}")
@@ -0,0 +1,148 @@
+# File: /modules/scan_writer.py
+# Bulk persistence for library scans: matched games are collected and written in batches with
+# multi-row inserts and one commit per batch
+
+import time
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from modules import db
+from modules.models import (
+    Game, Genre, Theme, GameMode, Platform, PlayerPerspective, Developer, Publisher, GameURL, Image,
+    game_genre_association, game_theme_association, game_game_mode_association,
+    game_platform_association, game_player_perspective_association
+)
+
+# record key: (taxonomy model, association table, association column)
+TAXONOMIES = {
+    'genres': (Genre, game_genre_association, 'genre_id'),
+    'themes': (Theme, game_theme_association, 'theme_id'),
+    'game_modes': (GameMode, game_game_mode_association, 'game_mode_id'),
+    'platforms': (Platform, game_platform_association, 'platform_id'),
+    'player_perspectives': (PlayerPerspective, game_player_perspective_association, 'player_perspective_id'),
+}
+
+
+class BulkGameWriter:
+    """
+    Collects new games as records and writes a batch of them in a handful of statements:
+    taxonomy rows are upserted with INSERT ... ON CONFLICT DO NOTHING RETURNING, games,
+    association rows, URLs and images go in as multi-row inserts, and the batch is committed once.
+
+    A record is a dict with
+        'game': Game column values, including a pre-generated 'uuid'
+        'genres', 'themes', 'game_modes', 'platforms', 'player_perspectives': lists of names
+        'developer', 'publisher': company name or None
+        'urls': (url_type, url) pairs
+        'images': (file name, image_type) pairs
+    and is added together with a payload the caller gets back once it is written.
+    """
+    def __init__(self, batch_size=50, max_delay=1.0):
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = max_delay
+        self.pending = []
+        self.first_added = None
+        # name -> id per taxonomy table, kept across batches of the scan
+        self.taxonomy_ids = {}
+
+    def add(self, record, payload):
+        if not self.pending:
+            self.first_added = time.monotonic()
+        self.pending.append((record, payload))
+
+    def due(self):
+        """
+        True once the batch is full, or its oldest game has waited max_delay seconds so new
+        games still show up in the library quickly.
+        """
+        if not self.pending:
+            return False
+        return len(self.pending) >= self.batch_size or time.monotonic() - self.first_added >= self.max_delay
+
+    def _resolve_names(self, model, names):
+        """
+        Returns name -> id for the names, inserting the ones missing from the table.
+        """
+        cache = self.taxonomy_ids.setdefault(model.__tablename__, {})
+        missing = [name for name in dict.fromkeys(names) if name not in cache]
+        if missing:
+            inserted = db.session.execute(
+                insert(model).values([{'name': name} for name in missing])
+                .on_conflict_do_nothing(index_elements=['name'])
+                .returning(model.id, model.name)
+            )
+            cache.update({name: id_ for id_, name in inserted})
+            existing = [name for name in missing if name not in cache]
+            if existing:
+                cache.update({name: id_ for id_, name in db.session.execute(
+                    select(model.id, model.name).where(model.name.in_(existing)))})
+        return cache
+
+    def flush(self):
+        """
+        Writes the pending games in one transaction.
+
+        Returns:
+            tuple: (stored, skipped, failed) payload lists. skipped games conflicted with a game
+            already in the database (same IGDB id or slug); failed ones were not written because
+            the batch raised, and can be retried one by one.
+        """
+        batch, self.pending = self.pending, []
+        if not batch:
+            return [], [], []
+
+        try:
+            records = [record for record, _ in batch]
+            company_ids = {}
+            for key, model in (('developer', Developer), ('publisher', Publisher)):
+                names = [record[key] for record in records if record.get(key)]
+                company_ids[key] = self._resolve_names(model, names) if names else {}
+            taxonomy_ids = {}
+            for key, (model, _, _) in TAXONOMIES.items():
+                names = [name for record in records for name in record.get(key, [])]
+                taxonomy_ids[key] = self._resolve_names(model, names) if names else {}
+
+            game_rows = []
+            for record in records:
+                row = dict(record['game'])
+                row['developer_id'] = company_ids['developer'].get(record.get('developer'))
+                row['publisher_id'] = company_ids['publisher'].get(record.get('publisher'))
+                game_rows.append(row)
+            inserted = db.session.execute(
+                insert(Game).values(game_rows).on_conflict_do_nothing().returning(Game.id, Game.uuid)
+            )
+            game_ids = {uuid: id_ for id_, uuid in inserted}
+
+            url_rows, image_rows = [], []
+            association_rows = {key: [] for key in TAXONOMIES}
+            for record in records:
+                game_uuid = record['game']['uuid']
+                game_id = game_ids.get(game_uuid)
+                if game_id is None:
+                    continue
+                for key, (_, _, column) in TAXONOMIES.items():
+                    ids = dict.fromkeys(taxonomy_ids[key][name] for name in record.get(key, []))
+                    association_rows[key].extend({'game_id': game_id, column: id_} for id_ in ids)
+                url_rows.extend({'game_uuid': game_uuid, 'url_type': url_type, 'url': url} for url_type, url in record.get('urls', []))
+                image_rows.extend({'game_uuid': game_uuid, 'image_type': image_type, 'url': file_name}
+                                  for file_name, image_type in record.get('images', []))
+
+            for key, (_, table, _) in TAXONOMIES.items():
+                if association_rows[key]:
+                    db.session.execute(insert(table).values(association_rows[key]).on_conflict_do_nothing())
+            if url_rows:
+                db.session.execute(insert(GameURL).values(url_rows))
+            if image_rows:
+                db.session.execute(insert(Image).values(image_rows))
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            # Ids handed out inside the rolled back transaction are gone
+            self.taxonomy_ids = {}
+            print(f"Bulk write of {len(batch)} games failed, falling back to single inserts: {e}")
+            return [], [], [payload for _, payload in batch]
+
+        stored = [payload for record, payload in batch if record['game']['uuid'] in game_ids]
+        skipped = [payload for record, payload in batch if record['game']['uuid'] not in game_ids]
+        print(f"Stored {len(stored)} games in one batch, {len(skipped)} already present.")
+        return stored, skipped, []
@@ -89,6 +89,12 @@ class DatabaseManager:
         ALTER TABLE download_requests
         ADD COLUMN IF NOT EXISTS file_location VARCHAR(255);
 
+        ALTER TABLE libraries
+        ADD COLUMN IF NOT EXISTS scan_concurrency INTEGER;
+
+        ALTER TABLE scan_jobs
+        ADD COLUMN IF NOT EXISTS scan_mode VARCHAR(10) DEFAULT 'folders';
+
         CREATE TABLE IF NOT EXISTS game_updates (
             id SERIAL PRIMARY KEY,
             uuid VARCHAR(36) UNIQUE NOT NULL,
@@ -1,5 +1,6 @@
 #/modules/utilities.py
-import re, requests, shutil, os, zipfile, smtplib, socket, time
+import re, requests, shutil, os, zipfile, smtplib, socket, time, difflib, queue, threading
+from uuid import uuid4
 from functools import wraps
 from flask import flash, redirect, url_for, request, current_app, flash
 from flask_login import current_user, login_user
@@ -8,10 +9,25 @@ from datetime import datetime
 from werkzeug.urls import url_parse
 from werkzeug.utils import secure_filename
 from modules.models import (
-    User, User, Whitelist, ReleaseGroup, Game, Image, DownloadRequest, Platform, Genre, Publisher, Developer, GameURL, Library, GameUpdate,
-    Theme, GameMode, MultiplayerMode, PlayerPerspective, ScanJob, UnmatchedFolder, category_mapping, status_mapping, player_perspective_mapping, GlobalSettings
+    User, User, Whitelist, Game, Image, DownloadRequest, Platform, Genre, Publisher, Developer, GameURL, Library, GameUpdate,
+    Theme, GameMode, MultiplayerMode, PlayerPerspective, ScanJob, UnmatchedFolder, category_mapping, status_mapping, GlobalSettings
 )
 from modules import db, mail
+from modules.igdb_api import post_igdb_request, token_manager, igdb_priority, current_igdb_priority, igdb_circuit_breaker, igdb_endpoint, igdb_image_url, PRIORITY_BULK
+from modules.http_client import request_with_retry
+from modules.igdb_cache import get_cached_response, store_response, cache_enabled, is_known_miss, known_misses, record_miss
+from modules.igdb_async import igdb_async
+from modules.igdb_catalog import lookup_catalog_game
+from modules.scan_pipeline import STAGE_DONE, ScanItemError, ScanStage, iter_scan_entries, run_discovery, put_or_stop
+from modules.scan_writer import BulkGameWriter
+from modules.scan_jobs import (
+    ScanCheckpoint, next_scheduled_run, start_running_scan, finish_running_scan, claim_library_scan, release_library_scan
+)
+from modules.folder_snapshot import FolderSnapshot
+from modules.folder_inspector import inspect_folder
+from modules.directory_sizes import DirectorySizeCache
+from modules.scan_memory import ScanMemory
+from modules.name_normalizer import get_name_normalizer, normalizer_for_patterns
 from sqlalchemy import func, String
 from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
 
@@ -144,65 +160,68 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def create_game_instance(game_data, full_disk_path, folder_size_bytes, library_uuid):
+def game_column_values(game_data, full_disk_path, folder_size_bytes, library_uuid):
+    """
+    The Game columns for a new game from IGDB game data.
+    """
+    category_id = game_data.get('category')
+    category_enum = category_mapping.get(category_id, None)
+    status_id = game_data.get('status')
+    status_enum = status_mapping.get(status_id, None)
+    if 'videos' in game_data:
+        video_urls = [f"https://www.youtube.com/watch?v={video['video_id']}" for video in game_data['videos']]
+        videos_comma_separated = ','.join(video_urls)
+    else:
+        videos_comma_separated = ""
+
+    return dict(
+        library_uuid=library_uuid,
+        igdb_id=game_data['id'],
+        name=game_data['name'],
+        summary=game_data.get('summary'),
+        storyline=game_data.get('storyline'),
+        url=game_data.get('url'),
+        first_release_date=datetime.utcfromtimestamp(game_data.get('first_release_date', 0)) if game_data.get('first_release_date') else None,
+        aggregated_rating=game_data.get('aggregated_rating'),
+        aggregated_rating_count=game_data.get('aggregated_rating_count'),
+        rating=game_data.get('rating'),
+        rating_count=game_data.get('rating_count'),
+        slug=game_data.get('slug'),
+        status=status_enum,
+        category=category_enum,
+        total_rating=game_data.get('total_rating'),
+        total_rating_count=game_data.get('total_rating_count'),
+        video_urls=videos_comma_separated,
+        full_disk_path=full_disk_path,
+        size=folder_size_bytes,
+        date_created=datetime.utcnow(),
+        date_identified=datetime.utcnow(),
+        steam_url='',
+        times_downloaded=0
+    )
+
+
+def create_game_instance(game_data, full_disk_path, folder_size_bytes, library_uuid, library=None):
     try:
         if not isinstance(game_data, dict):
             raise ValueError("create_game_instance game_data is not a dictionary")
 
-        # Fetch library details using library_uuid
-        library = Library.query.filter_by(uuid=library_uuid).first()
+        # Fetch library details using library_uuid, unless the caller already holds it
+        if library is None:
+            library = Library.query.filter_by(uuid=library_uuid).first()
         if not library:
             print(f"Library with UUID {library_uuid} not found.")
             return None
 
-        category_id = game_data.get('category')
-        category_enum = category_mapping.get(category_id, None)
-        status_id = game_data.get('status')
-        status_enum = status_mapping.get(status_id, None)
-        player_perspective_id = game_data.get('player_perspective')
-        player_perspective_enum = player_perspective_mapping.get(player_perspective_id, None)
-        # print(f"create_game_instance Player perspective ID: {player_perspective_id}, Enum: {player_perspective_enum}")
-        if 'videos' in game_data:
-            # print(f"create_game_instance Videos found for '{game_data.get('name')}'.")
-            video_urls = [f"https://www.youtube.com/watch?v={video['video_id']}" for video in game_data['videos']]
-            videos_comma_separated = ','.join(video_urls)
-        else:
-            # print(f"create_game_instance No videos found for '{game_data.get('name')}'.")
-            videos_comma_separated = ""
-            
         print(f"create_game_instance Creating game instance for '{game_data.get('name')}' with UUID: {game_data.get('id')} in library '{library.name}' on platform '{library.platform.name}'.")
-        new_game = Game(
-            library_uuid=library_uuid,
-            igdb_id=game_data['id'],
-            name=game_data['name'],
-            summary=game_data.get('summary'),
-            storyline=game_data.get('storyline'),
-            url=game_data.get('url'),
-            first_release_date=datetime.utcfromtimestamp(game_data.get('first_release_date', 0)) if game_data.get('first_release_date') else None,
-            aggregated_rating=game_data.get('aggregated_rating'),
-            aggregated_rating_count=game_data.get('aggregated_rating_count'),
-            rating=game_data.get('rating'),
-            rating_count=game_data.get('rating_count'),
-            slug=game_data.get('slug'),
-            status=status_enum,
-            category=category_enum,
-            total_rating=game_data.get('total_rating'),
-            total_rating_count=game_data.get('total_rating_count'),
-            video_urls=videos_comma_separated,
-            full_disk_path=full_disk_path,
-            size=folder_size_bytes,
-            date_created=datetime.utcnow(),
-            date_identified=datetime.utcnow(),
-            steam_url='',
-            times_downloaded=0
-        )
+        new_game = Game(**game_column_values(game_data, full_disk_path, folder_size_bytes, library_uuid))
         
         db.session.add(new_game)
         db.session.flush()
         
         # print(f"create_game_instance Game instance created for '{new_game.name}' with UUID: {new_game.uuid}. Proceeding to fetch URLs.")
         
-        fetch_and_store_game_urls(new_game.uuid, game_data['id'])
+        fetch_and_store_game_urls(new_game.uuid, game_data['id'], game_data.get('websites'))
         
         print(f"create_game_instance Finished processing game '{new_game.name}'. URLs (if any) have been fetched and stored.")
         if current_app.config['DISCORD_WEBHOOK_URL']:
@@ -215,12 +234,15 @@ def create_game_instance(game_data, full_disk_path, folder_size_bytes, library_u
 
 
 
-def fetch_and_store_game_urls(game_uuid, igdb_id):
+def fetch_and_store_game_urls(game_uuid, igdb_id, websites=None):
     try:
-        website_query = f'fields url, category; where game={igdb_id};'
-        # print(f"Fetching URLs for game IGDB ID {igdb_id} with query: {website_query}.")
-        
-        websites_response = make_igdb_api_request('https://api.igdb.com/v4/websites', website_query)
+        if websites is not None:
+            # Already expanded by the games query (websites.url, websites.category)
+            websites_response = websites
+        else:
+            website_query = f'fields url, category; where game={igdb_id};'
+            # print(f"Fetching URLs for game IGDB ID {igdb_id} with query: {website_query}.")
+            websites_response = make_igdb_api_request(igdb_endpoint('websites'), website_query)
         
         if websites_response and 'error' not in websites_response:
             # print(f"Retrieved URLs for game IGDB ID {igdb_id} : {websites_response}.")
@@ -240,56 +262,89 @@ def fetch_and_store_game_urls(game_uuid, igdb_id):
 
 
 
-def process_and_save_image(game_uuid, image_data, image_type='cover'):
-    url = None
-    save_path = None
-    file_name = None
+def resolve_image_url(image_data, image_type='cover'):
+    """
+    Returns (image id, url) for an expanded IGDB image object ({'id': ..., 'url': ...}) or a bare
+    image id, looking the URL up from the covers or screenshots endpoint when it is missing.
+    The url is None if it could not be found.
+    """
+    if isinstance(image_data, dict):
+        image_id = image_data.get('id')
+        url = image_data.get('url')
+    else:
+        image_id = image_data
+        url = None
+
+    if not url:
+        endpoint = igdb_endpoint('covers') if image_type == 'cover' else igdb_endpoint('screenshots')
+        response = make_igdb_api_request(endpoint, f'fields url; where id={image_id};')
+        if not response or 'error' in response:
+            print(f"Failed to retrieve URL for {image_type} ID {image_id}.")
+            return image_id, None
+        url = response[0].get('url')
+        if not url:
+            print(f"{image_type.capitalize()} URL not found for ID {image_id}.")
+    return image_id, url
+
+
+def get_game_images(game_data):
+    """
+    The (image_data, image_type) pairs of the cover and screenshots in IGDB game data.
+    """
+    images = [(screenshot_data, 'screenshot') for screenshot_data in game_data.get('screenshots', [])]
+    if 'cover' in game_data:
+        images.insert(0, (game_data['cover'], 'cover'))
+    return images
 
-    if image_type == 'cover':
-        cover_query = f'fields url; where id={image_data};'
-        cover_response = make_igdb_api_request('https://api.igdb.com/v4/covers', cover_query)
-        if cover_response and 'error' not in cover_response:
-            url = cover_response[0].get('url')
-            if url:
-                file_name = secure_filename(f"{game_uuid}_cover_{image_data}.jpg")
-            else:
-                print(f"Cover URL not found for ID {image_data}.")
-                return
+
+def download_game_images(game_uuid, images):
+    """
+    Downloads covers and screenshots of a game concurrently without touching the database.
+
+    images is a list of (image_data, image_type) pairs, image_data being anything accepted by
+    resolve_image_url. URL lookups and downloads overlap through the async IGDB client.
+
+    Returns:
+        list: (file_name, image_type) of every image that was requested for download.
+    """
+    resolved = igdb_async.map(resolve_image_url, images)
+
+    downloads = []
+    for (image_data, image_type), result in zip(images, resolved):
+        if isinstance(result, Exception):
+            print(f"Failed to resolve {image_type} {image_data}: {result}")
+            continue
+        image_id, url = result
+        if not url:
+            continue
+        if image_type == 'cover':
+            file_name = secure_filename(f"{game_uuid}_cover_{image_id}.jpg")
         else:
-            print(f"Failed to retrieve URL for cover ID {image_data}.")
-            return
+            file_name = secure_filename(f"{game_uuid}_{image_id}.jpg")
+        downloads.append((url, file_name, image_type))
+
+    igdb_async.map(download_image, [(url, os.path.join(current_app.config['IMAGE_SAVE_PATH'], file_name))
+                                    for url, file_name, _ in downloads])
+    return [(file_name, image_type) for _, file_name, image_type in downloads]
 
-        file_name = secure_filename(f"{game_uuid}_cover_{image_data}.jpg") 
-        save_path = os.path.join(current_app.config['IMAGE_SAVE_PATH'], file_name)
-        download_image(url, save_path)
-
-    elif image_type == 'screenshot':
-        screenshot_query = f'fields url; where id={image_data};'
-        response = make_igdb_api_request('https://api.igdb.com/v4/screenshots', screenshot_query)
-        if response and 'error' not in response:
-            url = response[0].get('url')
-            if url:
-                file_name = secure_filename(f"{game_uuid}_{image_data}.jpg")
-            else:
-                print(f"Screenshot URL not found for ID {image_data}.")
-                return
-            file_name = secure_filename(f"{game_uuid}_{image_data}.jpg") 
-    
-    # Check if file_name is set before proceeding
-    if not file_name:
-        print("File name could not be set. Exiting.")
-        return
-    save_path = os.path.join(current_app.config['IMAGE_SAVE_PATH'], file_name)
-    download_image(url, save_path)
 
-    if file_name and save_path:
+def add_game_images(game_uuid, downloaded_images):
+    for file_name, image_type in downloaded_images:
         image = Image(
             game_uuid=game_uuid,
             image_type=image_type,
             url=file_name,
         )
         db.session.add(image)
-    
+
+
+def save_game_images(game_uuid, images):
+    """
+    Downloads covers and screenshots of a game and records them as Images in the session
+    of the calling thread.
+    """
+    add_game_images(game_uuid, download_game_images(game_uuid, images))
+
 
 def website_category_to_string(category_id):
     # Mapping based on IGDB API documentation for website categories
@@ -359,208 +414,226 @@ PLATFORM_IDS = {
 }
 
     
-def retrieve_and_save_game(game_name, full_disk_path, scan_job_id=None, library_uuid=None):
-    print(f"rns Retrieving and saving game: {game_name} on {full_disk_path} to library with UUID {library_uuid}.")
-    # Fetch the library using the UUID
-    library = Library.query.filter_by(uuid=library_uuid).first()
-    if not library:
-        print(f"rns Library with UUID {library_uuid} not found.")
-        return None
-    
-    print(f"rns Finding a way to add {game_name} on {full_disk_path} to the library with UUID {library_uuid}.")
+# Images, websites and companies are expanded here so the game is stored from this one response
+GAME_QUERY_FIELDS = """fields id, name, cover.url, summary, url, release_dates.date, platforms.name, genres.name, themes.name, game_modes.name,
+                      screenshots.url, videos.video_id, first_release_date, aggregated_rating, player_perspectives.name,
+                      involved_companies.company.name, involved_companies.developer, involved_companies.publisher,
+                      websites.url, websites.category, aggregated_rating_count, rating, rating_count, slug, status, category, total_rating, 
+                      total_rating_count;"""
 
-    existing_game_by_path = check_existing_game_by_path(full_disk_path)
-    if existing_game_by_path:
-        return existing_game_by_path 
+# IGDB accepts at most 10 named sub-queries per multiquery request
+IGDB_MULTIQUERY_LIMIT = 10
 
-    print(f"rns No existing game found for {game_name} on {full_disk_path}. Proceeding to retrieve game data from IGDB API.")
-    platform_id = PLATFORM_IDS.get(library.platform.name)
-    print(f"rns Platform ID for {library.platform.name}: {platform_id}")
-    if platform_id is None:
-        print(f"No platform ID found for platform {library.platform.name}. Proceeding without a platform-specific search.")
-    else:
-        print(f"Performing a platform-specific search for {game_name} on platform ID: {platform_id}.")
-    query_fields = """fields id, name, cover, summary, url, release_dates.date, platforms.name, genres.name, themes.name, game_modes.name,
-                      screenshots, videos.video_id, first_release_date, aggregated_rating, involved_companies, player_perspectives.name,
-                      aggregated_rating_count, rating, rating_count, slug, status, category, total_rating, 
-                      total_rating_count;"""
-    query_filter = f'search "{game_name}"; limit 1;'
+
+def game_search_filter(game_name, platform_id=None):
+    # Names the offline catalog resolves are fetched by id instead of searched for
+    catalog_game = lookup_catalog_game(game_name, platform_id)
+    if catalog_game:
+        return f' where id = {catalog_game["id"]}; limit 1;'
+    escaped_name = game_name.replace('\\', '\\\\').replace('"', '\\"')
+    query_filter = f' search "{escaped_name}"; limit 1;'
     if platform_id is not None:
         query_filter += f' where platforms = ({platform_id});'
+    return query_filter
+
+
+def fetch_igdb_matches_batch(game_names, platform_id=None):
+    """
+    Searches IGDB for several game names at once through the multiquery endpoint, sending up to
+    IGDB_MULTIQUERY_LIMIT named sub-queries per request with the same fields and platform filter
+    as a single search.
+
+    Returns:
+        dict: game name -> list of matching games (empty list if IGDB found nothing). Names whose
+        request failed are left out so the caller falls back to a single search.
+    """
+    multiquery_endpoint = igdb_endpoint('multiquery')
+    unique_names = list(dict.fromkeys(game_names))
+    batches = [unique_names[start:start + IGDB_MULTIQUERY_LIMIT] for start in range(0, len(unique_names), IGDB_MULTIQUERY_LIMIT)]
+    queries = [
+        ''.join(f'query games "q{index}" {{ {GAME_QUERY_FIELDS}{game_search_filter(name, platform_id)} }};\n'
+                for index, name in enumerate(batch))
+        for batch in batches
+    ]
+    # Batches of more than IGDB_MULTIQUERY_LIMIT names are sent concurrently
+    responses = igdb_async.map(make_igdb_api_request, [(multiquery_endpoint, query) for query in queries])
+
+    results = {}
+    for batch, response_json in zip(batches, responses):
+        if not isinstance(response_json, list):
+            print(f"IGDB multiquery failed for {len(batch)} names: {response_json}")
+            continue
+        for subquery in response_json:
+            sub_name = subquery.get('name', '')
+            if sub_name.startswith('q') and sub_name[1:].isdigit() and int(sub_name[1:]) < len(batch):
+                results[batch[int(sub_name[1:])]] = subquery.get('result', [])
+    return results
+
 
-    response_json = make_igdb_api_request(current_app.config['IGDB_API_ENDPOINT'], query_fields + query_filter)
+def match_game(game_name, platform_name, igdb_results=None):
+    """
+    Looks a cleaned game name up on IGDB, or in the multiquery results of the running scan. Makes
+    no ORM writes, so scan workers can call it. While IGDB is unreachable the status is 'error'
+    and scans hold the folder until it is back, so games are always stored with full data.
+
+    Returns:
+        tuple: (game_data, status), status being 'matched', 'miss' (IGDB has no such game) or
+        'error' (IGDB could not be asked). game_data is None unless matched.
+    """
+    platform_id = PLATFORM_IDS.get(platform_name)
+    print(f"rns Platform ID for {platform_name}: {platform_id}")
+    if platform_id is None:
+        print(f"No platform ID found for platform {platform_name}. Proceeding without a platform-specific search.")
+    else:
+        print(f"Performing a platform-specific search for {game_name} on platform ID: {platform_id}.")
+    if igdb_results is not None and game_name in igdb_results:
+        # Already resolved by the multiquery batch of the running scan
+        response_json = igdb_results[game_name]
+    else:
+        response_json = make_igdb_api_request(current_app.config['IGDB_API_ENDPOINT'],
+                                              GAME_QUERY_FIELDS + game_search_filter(game_name, platform_id))
     print(f"retrieve_and_save Response JSON: {response_json}")
+
     if 'error' not in response_json and response_json:
+        print(f"Found game {game_name} with IGDB ID {response_json[0].get('id')}")
+        return response_json[0], 'matched'
+    if response_json == []:
+        # IGDB answered but has no such game, remember it so later scans skip this search
+        record_miss(game_name, platform_name)
+        return None, 'miss'
+    return None, 'error'
 
-        igdb_id = response_json[0].get('id')
-        print(f"Found game {game_name} with IGDB ID {igdb_id}")
 
-        # Check for existing game with the same IGDB ID but different folder path
+def save_matched_game(game_data, full_disk_path, library, scan_job_id, nfo_content, folder_size_bytes,
+                      downloaded_images=None, scan_context=None):
+    """
+    Stores a matched game with its taxonomy, companies, URLs and images. Images are downloaded
+    here unless downloaded_images lists the ones to record, which scans pass empty and fill in
+    from their enrich stage. Scans pass their ScanContext to check duplicates without a query.
+
+    Returns:
+        Game, or None if another folder already holds this IGDB game (logged as duplicate).
+    """
+    igdb_id = game_data.get('id')
+
+    # Check for existing game with the same IGDB ID but different folder path
+    if scan_context is not None:
+        existing_game_with_same_igdb_id = scan_context.is_duplicate(igdb_id, full_disk_path)
+    else:
         existing_game_with_same_igdb_id = Game.query.filter(Game.igdb_id == igdb_id, Game.full_disk_path != full_disk_path).first()
-        if existing_game_with_same_igdb_id:
-            print(f"Duplicate game found with same IGDB ID {igdb_id} but different folder path. Logging as duplicate.")
-            matched_status = 'Duplicate'
-            log_unmatched_folder(scan_job_id, full_disk_path, matched_status, library_uuid=library_uuid)
-            return None
+    if existing_game_with_same_igdb_id:
+        print(f"Duplicate game found with same IGDB ID {igdb_id} but different folder path. Logging as duplicate.")
+        matched_status = 'Duplicate'
+        log_unmatched_folder(scan_job_id, full_disk_path, matched_status, library_uuid=library.uuid)
+        if scan_context is not None:
+            scan_context.add_unmatched(full_disk_path)
+        return None
+
+    new_game = create_game_instance(game_data=game_data, full_disk_path=full_disk_path, folder_size_bytes=folder_size_bytes,
+                                    library_uuid=library.uuid, library=library)
+    if scan_context is not None:
+        scan_context.add_game(igdb_id, full_disk_path)
+
+    if 'genres' in game_data:
+        for genre_data in game_data['genres']:
+            genre_name = genre_data['name']
+            genre = Genre.query.filter_by(name=genre_name).first()
+            if not genre:
+                genre = Genre(name=genre_name)
+                db.session.add(genre)
+            new_game.genres.append(genre)
+
+    if 'involved_companies' in game_data:
+        involved_companies = game_data['involved_companies']
+        if involved_companies:
+            enumerate_companies(new_game, new_game.igdb_id, involved_companies)
         else:
-            print(f"attempting to read NFO content for game {game_name} on {full_disk_path}.")
-            nfo_content = read_first_nfo_content(full_disk_path)            
-            print(f"Calculating folder size for {full_disk_path}.")
-            folder_size_bytes = get_folder_size_in_bytes_updates(full_disk_path)
-            print(f"Folder size for {full_disk_path}: {format_size(folder_size_bytes)}")
-            new_game = create_game_instance(game_data=response_json[0], full_disk_path=full_disk_path, folder_size_bytes=folder_size_bytes, library_uuid=library.uuid)
-            
-                    
-            if 'genres' in response_json[0]:
-                for genre_data in response_json[0]['genres']:
-                    genre_name = genre_data['name']
-                    genre = Genre.query.filter_by(name=genre_name).first()
-                    if not genre:
-                        genre = Genre(name=genre_name)
-                        db.session.add(genre)
-                    new_game.genres.append(genre)
-
-            if 'involved_companies' in response_json[0]:
-                involved_company_ids = response_json[0]['involved_companies']
-                if involved_company_ids:
-                    enumerate_companies(new_game, new_game.igdb_id, involved_company_ids)
-                else:
-                    print(f"No involved companies found for {game_name}.")
+            print(f"No involved companies found for {new_game.name}.")
 
-            if 'themes' in response_json[0]:
-                for theme_data in response_json[0]['themes']:
-                    theme_name = theme_data['name']
-                    
-                    theme = Theme.query.filter_by(name=theme_name).first()
-                    if not theme:
-                        
-                        theme = Theme(name=theme_name)
-                        db.session.add(theme)
-                    
-                    new_game.themes.append(theme)
+    if 'themes' in game_data:
+        for theme_data in game_data['themes']:
+            theme_name = theme_data['name']
 
-            if 'game_modes' in response_json[0]:
-                for game_mode_data in response_json[0]['game_modes']:
-                    game_mode_name = game_mode_data['name']
-                    
-                    game_mode = GameMode.query.filter_by(name=game_mode_name).first()
-                    if not game_mode:
-                        
-                        game_mode = GameMode(name=game_mode_name)
-                        db.session.add(game_mode)
-                        db.session.flush()
-
-                    new_game.game_modes.append(game_mode)
-
-            if 'platforms' in response_json[0]:
-                for platform_data in response_json[0]['platforms']:
-                    platform_name = platform_data['name']
-                    platform = Platform.query.filter_by(name=platform_name).first()
-                    if not platform:
-                        platform = Platform(name=platform_name)
-                        db.session.add(platform)
-                    new_game.platforms.append(platform)
-                    
-            if 'player_perspectives' in response_json[0]:
-                for perspective_data in response_json[0]['player_perspectives']:
-                    perspective_name = perspective_data['name']
-                    perspective = PlayerPerspective.query.filter_by(name=perspective_name).first()
-                    if not perspective:
-                        perspective = PlayerPerspective(name=perspective_name)
-                        db.session.add(perspective)
-                    new_game.player_perspectives.append(perspective)
-                    
-            if 'videos' in response_json[0]:
-                video_urls = [f"https://www.youtube.com/embed/{video['video_id']}" for video in response_json[0]['videos']]
-                videos_comma_separated = ','.join(video_urls)
-                new_game.video_urls = videos_comma_separated
-            
-            # print(f"DEBUG Committing changes to database (1).")
-            db.session.commit()
-            print(f"Processing images for game: {new_game.name}.")
-            if 'cover' in response_json[0]:
-                process_and_save_image(new_game.uuid, response_json[0]['cover'], 'cover')
-            # print(f"DEBUG Committing changes to database (2).")
-            db.session.commit()
-            for screenshot_id in response_json[0].get('screenshots', []):
-                process_and_save_image(new_game.uuid, screenshot_id, 'screenshot')
-            # print(f"DEBUG Committing changes to database (3).")
-            db.session.commit()
-            try:
-                new_game.nfo_content = nfo_content
-                for column in new_game.__table__.columns:
-                    attr = getattr(new_game, column.name)
+            theme = Theme.query.filter_by(name=theme_name).first()
+            if not theme:
 
+                theme = Theme(name=theme_name)
+                db.session.add(theme)
 
+            new_game.themes.append(theme)
 
-                # print(f"DEBUG Committing changes to database (4).")
-                db.session.commit()
-                print(f"Game and its images saved successfully : {new_game.name}.")
-                # flash("Game and its images saved successfully.")
-            except IntegrityError as e:
-                db.session.rollback()
-                print(f"Failed to save game due to a database error: {e}")
-                flash("Failed to save game due to a duplicate entry.")
-            return new_game
+    if 'game_modes' in game_data:
+        for game_mode_data in game_data['game_modes']:
+            game_mode_name = game_mode_data['name']
+
+            game_mode = GameMode.query.filter_by(name=game_mode_name).first()
+            if not game_mode:
+
+                game_mode = GameMode(name=game_mode_name)
+                db.session.add(game_mode)
+                db.session.flush()
+
+            new_game.game_modes.append(game_mode)
+
+    if 'platforms' in game_data:
+        for platform_data in game_data['platforms']:
+            platform_name = platform_data['name']
+            platform = Platform.query.filter_by(name=platform_name).first()
+            if not platform:
+                platform = Platform(name=platform_name)
+                db.session.add(platform)
+            new_game.platforms.append(platform)
+
+    if 'player_perspectives' in game_data:
+        for perspective_data in game_data['player_perspectives']:
+            perspective_name = perspective_data['name']
+            perspective = PlayerPerspective.query.filter_by(name=perspective_name).first()
+            if not perspective:
+                perspective = PlayerPerspective(name=perspective_name)
+                db.session.add(perspective)
+            new_game.player_perspectives.append(perspective)
+
+    if 'videos' in game_data:
+        video_urls = [f"https://www.youtube.com/embed/{video['video_id']}" for video in game_data['videos']]
+        videos_comma_separated = ','.join(video_urls)
+        new_game.video_urls = videos_comma_separated
+
+    # print(f"DEBUG Committing changes to database (1).")
+    db.session.commit()
+    print(f"Processing images for game: {new_game.name}.")
+    if downloaded_images is not None:
+        add_game_images(new_game.uuid, downloaded_images)
     else:
-        if scan_job_id:
-            pass
-        print(f"IGDB match failed: {game_name} in library {library.name} on platform {library.platform.name}.")
-        error_message = "No game data found for the given name or failed to retrieve data from IGDB API."
-        # print(error_message)
-        flash(error_message)
-        return None
- 
-def check_existing_game_by_path(full_disk_path):
-    """
-    Checks if a game already exists in the library by its disk path.
+        save_game_images(new_game.uuid, get_game_images(game_data))
+    # print(f"DEBUG Committing changes to database (2).")
+    db.session.commit()
+    try:
+        new_game.nfo_content = nfo_content
+        # print(f"DEBUG Committing changes to database (4).")
+        db.session.commit()
+        print(f"Game and its images saved successfully : {new_game.name}.")
+        # flash("Game and its images saved successfully.")
+    except IntegrityError as e:
+        db.session.rollback()
+        print(f"Failed to save game due to a database error: {e}")
+        flash("Failed to save game due to a duplicate entry.")
+    return new_game
 
-    Parameters:
-    - full_disk_path: The full disk path of the game to check.
 
-    Returns:
-    - The existing Game object if found, None otherwise.
+def inspect_game_folder(full_disk_path, **options):
     """
-    existing_game_by_path = Game.query.filter_by(full_disk_path=full_disk_path).first()
-    if existing_game_by_path:
-        print(f"Skipping {existing_game_by_path.name} on {full_disk_path} (path already in library).")
-        return existing_game_by_path 
-    return None
+    Inspects a game folder with inspect_folder, leaving the update and extras folders named in
+    the global settings out of its size, which is measured with the directory size cache.
+    """
+    settings = GlobalSettings.query.first()
+    return inspect_folder(full_disk_path,
+                          settings.update_folder_name if settings else None,
+                          settings.extras_folder_name if settings else None,
+                          size_cache=DirectorySizeCache(db.engine),
+                          **options)
 
-def get_folder_size_in_bytes(folder_path):
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(folder_path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            if os.path.exists(fp):
-                total_size += os.path.getsize(fp)
-    return total_size
-    
 def get_folder_size_in_bytes_updates(folder_path):
-    settings = GlobalSettings.query.first()
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(folder_path):
-        for f in filenames:
-            if settings.update_folder_name and settings.update_folder_name != "" and settings.extras_folder_name and settings.extras_folder_name != "":
-                if settings.update_folder_name.lower() not in dirpath.lower() and settings.extras_folder_name.lower() not in dirpath.lower():
-                    fp = os.path.join(dirpath, f)
-                    if os.path.exists(fp):
-                        total_size += os.path.getsize(fp)
-            elif settings.update_folder_name and settings.update_folder_name != "":
-                if settings.update_folder_name.lower() not in dirpath.lower():
-                    fp = os.path.join(dirpath, f)
-                    if os.path.exists(fp):
-                        total_size += os.path.getsize(fp)
-            elif settings.extras_folder_name and settings.extras_folder_name != "":
-                if settings.extras_folder_name.lower() not in dirpath.lower():
-                    fp = os.path.join(dirpath, f)
-                    if os.path.exists(fp):
-                        total_size += os.path.getsize(fp)
-            else:
-                fp = os.path.join(dirpath, f)
-                if os.path.exists(fp):
-                    total_size += os.path.getsize(fp)
-    return total_size
+    return inspect_game_folder(folder_path, read_nfo_content=False).size_bytes or 0
 
 def process_game_updates(game_name, full_disk_path, updates_folder, library_uuid):
     print(f"Processing updates for game: {game_name}")
@@ -581,8 +654,9 @@ def process_game_updates(game_name, full_disk_path, updates_folder, library_uuid
     for update_folder in update_folders:
         update_path = os.path.join(updates_folder, update_folder)
         print(f"Processing update: {update_folder}")
-        
-        significant_files = [f for f in os.listdir(update_path) if not f.lower().endswith(('.sfv', '.nfo'))]
+
+        inspection = inspect_folder(update_path, measure=False)
+        significant_files = inspection.significant_files
         print(f"Significant files in update folder: {significant_files}")
 
         if len(significant_files) == 1:
@@ -599,13 +673,13 @@ def process_game_updates(game_name, full_disk_path, updates_folder, library_uuid
             game_update = GameUpdate(
                 game_uuid=game.uuid,
                 file_path=file_path,
-                nfo_content=read_first_nfo_content(update_path)
+                nfo_content=inspection.nfo_content
             )
             db.session.add(game_update)
         else:
             print(f"Updating existing GameUpdate record for {file_path}")
             game_update.file_path = file_path
-            game_update.nfo_content = read_first_nfo_content(update_path)
+            game_update.nfo_content = inspection.nfo_content
 
     try:
         db.session.commit()
@@ -616,21 +690,28 @@ def process_game_updates(game_name, full_disk_path, updates_folder, library_uuid
 
     print(f"Finished processing updates for game: {game_name}")
 
-def enumerate_companies(game_instance, igdb_game_id, involved_company_ids):
+def enumerate_companies(game_instance, igdb_game_id, involved_companies):
+    """
+    Assigns developer and publisher from the involved companies of a game. Accepts either the
+    expanded objects from a games query (involved_companies.company.name, .developer, .publisher)
+    or a list of involved company ids, which are then looked up from IGDB.
+    """
     print(f"Enumerating companies for game {game_instance.name} with IGDB ID {igdb_game_id}.")
-    if not involved_company_ids:
+    if not involved_companies:
         print("No company IDs provided for enumeration.")
         return
 
-    company_ids_str = ','.join(map(str, involved_company_ids))
-    print(f"Company IDs: {company_ids_str}")
-
     try:
-        response_json = make_igdb_api_request(
-            "https://api.igdb.com/v4/involved_companies",
-            f"""fields company.name, developer, publisher, game;
-                where game={igdb_game_id} & id=({company_ids_str});"""
-        )
+        if all(isinstance(company, dict) for company in involved_companies):
+            response_json = involved_companies
+        else:
+            company_ids_str = ','.join(map(str, involved_companies))
+            print(f"Company IDs: {company_ids_str}")
+            response_json = make_igdb_api_request(
+                igdb_endpoint("involved_companies"),
+                f"""fields company.name, developer, publisher, game;
+                    where game={igdb_game_id} & id=({company_ids_str});"""
+            )
 
         if not isinstance(response_json, list):
             print(f"Unexpected response structure: {response_json}")
@@ -680,27 +761,34 @@ def enumerate_companies(game_instance, igdb_game_id, involved_company_ids):
 
 
 
-def make_igdb_api_request(endpoint_url, query_params):
+def make_igdb_api_request(endpoint_url, query_params, use_cache=True):
     # print(f"make_igdb_api_request {endpoint_url} with query: {query_params}")
     client_id = current_app.config['IGDB_CLIENT_ID']
     client_secret = current_app.config['IGDB_CLIENT_SECRET']
-    access_token = get_access_token(client_id, client_secret) 
-
-    if not access_token:
-        return {"error": "make_igdb_api_request Failed to retrieve access token"}
+    use_cache = use_cache and cache_enabled()
 
-    headers = {
-        'Client-ID': client_id,
-        'Authorization': f"Bearer {access_token}"
-    }
+    if use_cache:
+        try:
+            cached = get_cached_response(endpoint_url, query_params)
+            if cached is not None:
+                return cached
+        except SQLAlchemyError as e:
+            print(f"make_igdb_api_request IGDB cache lookup failed: {e}")
 
     try:
-        # print(f"make_igdb_api_request Attempting to make a request to {endpoint_url} with headers: {headers} and query: {query_params}")
-        response = requests.post(endpoint_url, headers=headers, data=query_params)
+        # print(f"make_igdb_api_request Attempting to make a request to {endpoint_url} with query: {query_params}")
+        response = post_igdb_request(endpoint_url, query_params, client_id, client_secret)
+        if response is None:
+            return {"error": "make_igdb_api_request Failed to retrieve access token"}
         response.raise_for_status()
         data = response.json()
         # print(f"make_igdb_api_request Response from IGDB API: {data}")
-        return response.json()
+        if use_cache and isinstance(data, list):
+            try:
+                store_response(endpoint_url, query_params, data)
+            except SQLAlchemyError as e:
+                print(f"make_igdb_api_request IGDB cache store failed: {e}")
+        return data
 
     except requests.RequestException as e:
         return {"error": f"make_igdb_api_request API Request failed: {e}"}
@@ -713,16 +801,17 @@ def make_igdb_api_request(endpoint_url, query_params):
     
 
 def download_image(url, save_path):
-    # Ensure the URL starts with http:// or https://
+    # Ensure the URL starts with http:// or https://, on the configured image host
     if not url.startswith(('http://', 'https://')):
         url = 'https:' + url
+    url = igdb_image_url(url)
 
     # Replace thumbnail image path with original image path
     url = url.replace('/t_thumb/', '/t_original/')
 
-    # Attempt to download the image
+    # Attempt to download the image over the pooled CDN session, with timeouts and retries
     try:
-        response = requests.get(url)
+        response = request_with_retry('GET', url)
         if response.status_code == 200:
             # Extract the directory path from the save_path
             directory = os.path.dirname(save_path)
@@ -878,22 +967,10 @@ def zip_folder(download_request_id, app, file_location, file_name):
 
 def read_first_nfo_content(full_disk_path):
     print(f"Searching for NFO file in: {full_disk_path}")
-    try:
-        for file in os.listdir(full_disk_path):
-            if file.lower().endswith('.nfo'):
-                nfo_path = os.path.join(full_disk_path, file)
-                print(f"Found NFO file: {nfo_path}")
-                try:
-                    with open(nfo_path, 'r', encoding='utf-8', errors='ignore') as nfo_file:
-                        content = nfo_file.read()
-                        sanitized_content = content.replace('\x00', '')
-                        print(f"Successfully read NFO content (length: {len(sanitized_content)})")
-                        return sanitized_content
-                except Exception as e:
-                    print(f"Error reading NFO file {nfo_path}: {str(e)}")
-    except Exception as e:
-        print(f"Error accessing directory {full_disk_path}: {str(e)}")
-    
+    inspection = inspect_folder(full_disk_path, measure=False)
+    if inspection.nfo_content is not None:
+        print(f"Found NFO file: {inspection.nfo_path} (length: {len(inspection.nfo_content)})")
+        return inspection.nfo_content
     print("No NFO file found")
     return None
 
@@ -924,25 +1001,25 @@ def log_unmatched_folder(scan_job_id, folder_path, matched_status, library_uuid=
         print(f"Unmatched folder already logged for: {folder_path}. Skipping.")
 
 def refresh_images_in_background(game_uuid):
-    with current_app.app_context():
+    # Image refreshes run in the bulk lane so interactive IGDB lookups are served first
+    with current_app.app_context(), igdb_priority(PRIORITY_BULK):
         game = Game.query.filter_by(uuid=game_uuid).first()
         if not game:
             print("Game not found.")
             return
         try:
+            # A refresh wants the current image URLs, not the cached response
             response_json = make_igdb_api_request(current_app.config['IGDB_API_ENDPOINT'],
                 f"""fields id, cover.url, screenshots.url;
-                    where id = {game.igdb_id}; limit 1;""")
+                    where id = {game.igdb_id}; limit 1;""", use_cache=False)
 
             if 'error' not in response_json and response_json:
                 delete_game_images(game_uuid)
+                images = [(screenshot, 'screenshot') for screenshot in response_json[0].get('screenshots', [])]
                 cover_data = response_json[0].get('cover')
                 if cover_data:
-                    process_and_save_image(game.uuid, cover_data['id'], image_type='cover')
-
-                screenshots_data = response_json[0].get('screenshots', [])
-                for screenshot in screenshots_data:
-                    process_and_save_image(game.uuid, screenshot['id'], image_type='screenshot')
+                    images.insert(0, (cover_data, 'cover'))
+                save_game_images(game.uuid, images)
 
                 db.session.commit()
                 flash("Game images refreshed successfully.", "success")
@@ -1036,19 +1113,11 @@ def escape_special_characters(pattern):
 
 
 def get_access_token(client_id, client_secret):
-    url = "https://id.twitch.tv/oauth2/token"
-    params = {
-        'client_id': client_id,
-        'client_secret': client_secret,
-        'grant_type': 'client_credentials'
-    }
-    response = requests.post(url, params=params)
-    if response.status_code == 200:
-        return response.json()['access_token']
-        # print("Access token obtained successfully")
-    else:
+    # Served from the shared token manager, a new token is only requested when the cached one expires
+    access_token = token_manager.get_token(client_id, client_secret)
+    if not access_token:
         print("Failed to obtain access token")
-        return None
+    return access_token
 
 def get_cover_thumbnail_url(igdb_id):
     """
@@ -1061,7 +1130,7 @@ def get_cover_thumbnail_url(igdb_id):
     str: The URL of the cover thumbnail, or None if not found.
     """
     cover_query = f'fields url; where game={igdb_id};'
-    response = make_igdb_api_request('https://api.igdb.com/v4/covers', cover_query)
+    response = make_igdb_api_request(igdb_endpoint('covers'), cover_query)
 
     if response and 'error' not in response and len(response) > 0:
         cover_url = response[0].get('url')
@@ -1086,7 +1155,7 @@ def get_cover_url(igdb_id):
     str: The cover URL of the cover image, or None if not found.
     """
     cover_query = f'fields image_id; where game={igdb_id};'
-    response = make_igdb_api_request('https://api.igdb.com/v4/covers', cover_query)
+    response = make_igdb_api_request(igdb_endpoint('covers'), cover_query)
 
     if response and 'error' not in response and len(response) > 0:
         cover_image_id = response[0].get('image_id')
@@ -1101,8 +1170,35 @@ def get_cover_url(igdb_id):
     return None
 
 
-def scan_and_add_games(folder_path, scan_mode='folders', library_uuid=None):
-    settings = GlobalSettings.query.first()
+def scan_and_add_games(folder_path, scan_mode='folders', library_uuid=None, scan_job_entry=None, schedule=None):
+    """
+    Scans a library folder and adds the games found. Entries that are already in the library
+    and unchanged since the last scan are skipped using the folder snapshot. Pass
+    scan_job_entry to resume a job that was interrupted; folders it already finished are
+    skipped. A new job with a schedule ('8_hours', '24_hours', '48_hours') is run again by the
+    scan scheduler.
+
+    Only one scan per library runs at a time, scans of different libraries run in parallel.
+    """
+    if not claim_library_scan(library_uuid, scan_job_entry.id if scan_job_entry else None):
+        print(f"A scan of library {library_uuid} is already running, not starting another one.")
+        if scan_job_entry is not None:
+            scan_job_entry.status = 'Failed'
+            scan_job_entry.error_message = 'Another scan of this library was already running.'
+            db.session.commit()
+        return
+    try:
+        # The scan gets its own app context and so its own sessions, which it closes between
+        # batches without touching the caller's
+        with current_app.app_context():
+            if scan_job_entry is not None:
+                scan_job_entry = db.session.get(ScanJob, scan_job_entry.id)
+            run_library_scan(folder_path, scan_mode, library_uuid, scan_job_entry, schedule)
+    finally:
+        release_library_scan(library_uuid)
+
+
+def run_library_scan(folder_path, scan_mode, library_uuid, scan_job_entry, schedule):
     # First, find the library and its platform
     library = Library.query.filter_by(uuid=library_uuid).first()
     if not library:
@@ -1111,26 +1207,31 @@ def scan_and_add_games(folder_path, scan_mode='folders', library_uuid=None):
 
     print(f"Starting auto scan for games in folder: {folder_path} with scan mode: {scan_mode} and library UUID: {library_uuid} for platform: {library.platform.name}")
 
-    # Create initial scan job
-    scan_job_entry = ScanJob(
-        folders={folder_path: True},
-        content_type='Games',
-        status='Running',
-        is_enabled=True,
-        last_run=datetime.now(),
-        library_uuid=library_uuid,
-        error_message='',
-        total_folders=0,
-        folders_success=0,
-        folders_failed=0
-    )
-    
-    db.session.add(scan_job_entry)
-    try:
-        db.session.commit()
-    except SQLAlchemyError as e:
-        print(f"Database error when adding ScanJob: {str(e)}")
-        return  # cannot proceed without ScanJob
+    if scan_job_entry is None:
+        # Create initial scan job
+        started = datetime.now()
+        scan_job_entry = ScanJob(
+            folders={folder_path: True},
+            content_type='Games',
+            schedule=schedule,
+            status='Running',
+            is_enabled=True,
+            last_run=started,
+            next_run=next_scheduled_run(schedule, started),
+            library_uuid=library_uuid,
+            scan_mode=scan_mode,
+            error_message='',
+            total_folders=0,
+            folders_success=0,
+            folders_failed=0
+        )
+
+        db.session.add(scan_job_entry)
+        try:
+            db.session.commit()
+        except SQLAlchemyError as e:
+            print(f"Database error when adding ScanJob: {str(e)}")
+            return  # cannot proceed without ScanJob
 
     # Check access perm
     if not os.path.exists(folder_path) or not os.access(folder_path, os.R_OK):
@@ -1144,26 +1245,14 @@ def scan_and_add_games(folder_path, scan_mode='folders', library_uuid=None):
             print(f"Database error when updating ScanJob with error: {str(e)}")
         return
 
-    # Load patterns before they are used
-    insensitive_patterns, sensitive_patterns = load_release_group_patterns()
-
     try:
+        # Known folders, duplicates and release group patterns are loaded once for the whole scan
+        context = ScanContext(library)
         supported_extensions = current_app.config['ALLOWED_FILE_TYPES']
-
-        # Use patterns in function calls
-        if scan_mode == 'folders':
-            game_names_with_paths = get_game_names_from_folder(folder_path, insensitive_patterns, sensitive_patterns)
-        elif scan_mode == 'files':
-            game_names_with_paths = get_game_names_from_files(folder_path, supported_extensions, insensitive_patterns, sensitive_patterns)
-
-        scan_job_entry.total_folders = len(game_names_with_paths)
-        db.session.commit()
-        if not game_names_with_paths:
-            print(f"No games found in folder: {folder_path}")
-            scan_job_entry.status = 'Completed'
-            scan_job_entry.error_message = "No games found."
-            db.session.commit()
-            return
+        checkpoint = ScanCheckpoint(scan_job_entry.id)
+        snapshot = FolderSnapshot(library_uuid, folder_path, current_app.config['UPDATE_FOLDER_NAME'])
+        entries = iter_scan_entries(folder_path, scan_mode, supported_extensions)
+        entries = checkpoint.track(snapshot.changed(entries, context.game_paths | context.unmatched_paths))
     except Exception as e:
         scan_job_entry.status = 'Failed'
         scan_job_entry.error_message = str(e)
@@ -1171,108 +1260,654 @@ def scan_and_add_games(folder_path, scan_mode='folders', library_uuid=None):
         print(f"Error during pattern loading or game name extraction: {str(e)}")
         return
 
-    for game_info in game_names_with_paths:
-        db.session.refresh(scan_job_entry)  # Check if the job is still enabled
-        if not scan_job_entry.is_enabled:
-            scan_job_entry.status = 'Failed'
-            scan_job_entry.error_message = 'Scan cancelled by the captain'
-            db.session.commit()
-            return  # Stop processing if cancelled
-        
-        game_name = game_info['name']
-        full_disk_path = game_info['full_path']
-        
-        try:
-            success = process_game_with_fallback(game_name, full_disk_path, scan_job_entry.id, library_uuid)
-            if success:
-                scan_job_entry.folders_success += 1
-                
-                # Check for updates folder
-                updates_folder = os.path.join(full_disk_path, current_app.config['UPDATE_FOLDER_NAME'])
-                print(f"Checking for updates folder: {updates_folder}")
-                if os.path.exists(updates_folder) and os.path.isdir(updates_folder):
-                    print(f"Updates folder found for game: {game_name}")
-                    process_game_updates(game_name, full_disk_path, updates_folder, library_uuid)
-                else:
-                    print(f"No updates folder found for game: {game_name}")
+    if checkpoint.finished:
+        # Resumed job, count what the earlier run finished from its work list
+        counts = checkpoint.counts()
+        scan_job_entry.folders_success = counts.get('Matched', 0)
+        scan_job_entry.folders_failed = counts.get('Unmatched', 0) + counts.get('Failed', 0)
+        print(f"Resuming scan job {scan_job_entry.id}, {len(checkpoint.finished)} folders already done.")
+
+    concurrency = get_scan_concurrency(library)
+    print(f"Scanning {folder_path} with {concurrency} match workers.")
+
+    # Folders stream through discover -> normalize -> match -> persist -> enrich. Bounded queues
+    # keep memory flat for huge folders; this thread is the persist stage and the only writer.
+    # The registry lets cancel_scan_job stop the scan right away.
+    running = start_running_scan(scan_job_entry.id)
+    stop = running.stop
+    discovered = {'found': len(checkpoint.finished)}
+    normalize_queue = queue.Queue(maxsize=concurrency * IGDB_MULTIQUERY_LIMIT)
+    match_queue = queue.Queue(maxsize=concurrency * IGDB_MULTIQUERY_LIMIT)
+    persist_queue = queue.Queue(maxsize=concurrency * 2)
+    enrich_queue = queue.Queue(maxsize=concurrency * 2)
+    # Unbounded, since the writer feeds enrich_queue it must never wait on the enrich results
+    enriched_queue = queue.Queue()
+
+    # Workers that touch the database drop their session after each batch, so nothing they
+    # loaded stays around for the rest of the scan
+    stages = [
+        ScanStage('normalize', lambda batch: normalize_scan_entries(batch, context),
+                  normalize_queue, match_queue, batch_size=100),
+        ScanStage('match', lambda batch: match_scan_folders(batch, context, stop),
+                  match_queue, persist_queue, workers=concurrency, batch_size=IGDB_MULTIQUERY_LIMIT,
+                  after_batch=db.session.remove),
+        ScanStage('enrich', enrich_scan_games, enrich_queue, enriched_queue, workers=concurrency,
+                  after_batch=db.session.remove),
+    ]
+    app = current_app._get_current_object()
+    priority = current_igdb_priority()
+    try:
+        threading.Thread(target=run_discovery, args=(entries, normalize_queue, stop, discovered),
+                         name='scan-discover', daemon=True).start()
+        for stage in stages:
+            stage.start(app, priority, stop)
+
+        # New games are written in batches and progress is kept in memory, committed every
+        # SCAN_PROGRESS_INTERVAL seconds or SCAN_PROGRESS_FOLDERS folders, so scans are not bound
+        # by database round trips. Each commit ends a batch: its session is closed and the next
+        # batch starts with a fresh one, so memory stays flat however large the library is.
+        game_writer = BulkGameWriter(batch_size=current_app.config.get('SCAN_BATCH_SIZE', 50))
+        progress_interval = current_app.config.get('SCAN_PROGRESS_INTERVAL', 5)
+        progress_folders = current_app.config.get('SCAN_PROGRESS_FOLDERS', 100)
+        memory = ScanMemory()
+        last_flushed = time.monotonic()
+        unflushed = 0
+        aborted = False
+        while True:
+            store_enriched_images(enriched_queue)
+            if game_writer.due():
+                try:
+                    flush_scan_games(game_writer, scan_job_entry, library, enrich_queue, stop, checkpoint)
+                except Exception as e:
+                    abort_library_scan(scan_job_entry, e, stop, checkpoint)
+                    aborted = True
+            try:
+                prepared = persist_queue.get(timeout=1)
+            except queue.Empty:
+                prepared = None
+            if prepared is STAGE_DONE:
+                break
+            if stop.is_set():
+                continue  # Cancelled, drain the pipeline
+            if time.monotonic() - last_flushed >= progress_interval or unflushed >= progress_folders:
+                try:
+                    scan_job_entry.total_folders = discovered['found']
+                    checkpoint.save()
+                    snapshot.save(checkpoint.pop_saved())
+                    db.session.commit()
+                    if scan_job_cancelled(scan_job_entry):
+                        stop.set()
+                        continue
+                    scan_job_entry, library = start_scan_batch(scan_job_entry.id, library_uuid, context)
+                except Exception as e:
+                    abort_library_scan(scan_job_entry, e, stop, checkpoint)
+                    aborted = True
+                    continue
+                if unflushed:
+                    print(f"Scan batch {memory.batches + 1} of {folder_path}: {unflushed} folders, "
+                          f"peak memory {format_size(memory.end_batch())}.")
+                last_flushed = time.monotonic()
+                unflushed = 0
+            if prepared is None:
+                continue
+            unflushed += 1
+
+            failure = None
+            if isinstance(prepared, ScanItemError):
+                # Failed in an earlier stage; item is the folder as that stage received it
+                failure = (prepared.item.get('name', prepared.item.get('entry')), prepared.item.get('full_path'), prepared.error)
             else:
-                scan_job_entry.folders_failed += 1
-                print(f"Failed to process game {game_name} after fallback attempts.")   
-            db.session.commit()
+                game_info = prepared['game_info']
+                try:
+                    success = persist_scan_folder(prepared, library, scan_job_entry.id, context, game_writer)
+                    if success is not None and success is not FOLDER_HELD:
+                        record_scan_result(scan_job_entry, game_info, success, library_uuid, checkpoint)
+                except Exception as e:
+                    db.session.rollback()
+                    failure = (game_info['name'], game_info['full_path'], e)
+            if failure:
+                try:
+                    record_scan_failure(scan_job_entry, *failure, checkpoint)
+                except Exception as e:
+                    abort_library_scan(scan_job_entry, e, stop, checkpoint)
+                    aborted = True
+                    continue
+            running.update(scan_job_entry, discovered['found'])
+            memory.sample()
 
+        # Games matched before a cancel are still stored
+        try:
+            flush_scan_games(game_writer, scan_job_entry, library, enrich_queue, stop, checkpoint)
         except Exception as e:
-            print(f"Failed to process game {game_name}: {e}")
-            scan_job_entry.folders_failed += 1
-            scan_job_entry.status = 'Failed'
-            scan_job_entry.error_message += f" Failed to process {game_name}: {str(e)}; "
+            abort_library_scan(scan_job_entry, e, stop, checkpoint)
+            aborted = True
+        enrich_queue.put(STAGE_DONE)
+        while store_enriched_images(enriched_queue, block=True):
+            pass
+        try:
+            checkpoint.save()
+            # Folders an earlier run of a resumed job finished are recorded as well
+            snapshot.save(checkpoint.pop_saved() + list(checkpoint.finished))
+            snapshot.finish()
+            checkpoint.clear()
+            scan_job_entry.total_folders = discovered['found']
+        except Exception as e:
+            abort_library_scan(scan_job_entry, e, stop, checkpoint)
+            aborted = True
+        if stop.is_set():
+            if not aborted:
+                scan_job_entry.status = 'Failed'
+                scan_job_entry.error_message = 'Scan cancelled by the captain'
             db.session.commit()
+            return  # Stop processing if cancelled or aborted
 
-    if scan_job_entry.status != 'Failed':
-        scan_job_entry.status = 'Completed'
+        if discovered.get('error'):
+            scan_job_entry.status = 'Failed'
+            scan_job_entry.error_message += f" Failed to list {folder_path}: {discovered['error']}; "
+        elif not discovered['found'] and snapshot.unchanged:
+            print(f"No new or changed folders in: {folder_path}")
+        elif not discovered['found']:
+            print(f"No games found in folder: {folder_path}")
+            scan_job_entry.error_message = "No games found."
+
+        if scan_job_entry.status != 'Failed':
+            scan_job_entry.status = 'Completed'
     
+        try:
+            db.session.commit()
+            print(f"Scan completed for folder: {folder_path} with ScanJob ID: {scan_job_entry.id}")
+        except SQLAlchemyError as e:
+            print(f"Database error when finalizing ScanJob: {str(e)}")
+        memory.end_batch()
+        print(f"Peak memory of the scan of {folder_path}: {format_size(memory.scan_peak)} over {memory.batches} batches.")
+    finally:
+        finish_running_scan(scan_job_entry.id)
+
+
+def start_scan_batch(scan_job_id, library_uuid, context):
+    """
+    Closes the session of the batch a scan just committed, dropping everything it loaded, and
+    loads the scan job and library into the fresh session of the next batch.
+
+    Returns:
+        tuple: (scan job, library) of the new session
+    """
+    db.session.remove()
+    scan_job_entry = db.session.get(ScanJob, scan_job_id)
+    library = db.session.get(Library, library_uuid)
+    context.library = library
+    return scan_job_entry, library
+
+
+
+def resume_interrupted_scans():
+    """
+    Continues scan jobs left Running by a restart from their work list. Jobs that were
+    cancelled or whose library is gone are marked Failed instead.
+    """
+    app = current_app._get_current_object()
+    interrupted = ScanJob.query.filter_by(status='Running').order_by(ScanJob.last_run).all()
+    for scan_job_entry in interrupted:
+        folder_path = next(iter(scan_job_entry.folders or {}), None)
+        if not scan_job_entry.is_enabled:
+            scan_job_entry.status = 'Failed'
+            scan_job_entry.error_message = 'Scan cancelled by the captain'
+        elif not folder_path or not scan_job_entry.library:
+            scan_job_entry.status = 'Failed'
+            scan_job_entry.error_message = 'Scan interrupted by a restart and could not be resumed.'
+        else:
+            # Each library resumes in its own thread, like scans started by hand
+            print(f"Resuming interrupted scan job {scan_job_entry.id} for {folder_path}")
+            threading.Thread(target=resume_scan_job, args=(app, scan_job_entry.id, folder_path),
+                             name=f"ScanResume-{scan_job_entry.id}", daemon=True).start()
+            continue
+        ScanCheckpoint(scan_job_entry.id).clear()
+        db.session.commit()
+        print(f"Scan job {scan_job_entry.id} was interrupted and not resumed: {scan_job_entry.error_message}")
+
+
+def resume_scan_job(app, scan_job_id, folder_path):
+    with app.app_context(), igdb_priority(PRIORITY_BULK):
+        scan_job_entry = ScanJob.query.get(scan_job_id)
+        scan_and_add_games(folder_path, scan_job_entry.scan_mode or 'folders', scan_job_entry.library_uuid,
+                           scan_job_entry=scan_job_entry)
+
+
+def get_scan_concurrency(library):
+    """
+    Number of folders a scan of the library processes in parallel: the library's own
+    scan_concurrency if set, otherwise SCAN_WORKERS from the config.
+    """
+    concurrency = library.scan_concurrency or current_app.config.get('SCAN_WORKERS', 4)
+    return max(1, int(concurrency))
+
+
+def scan_job_cancelled(scan_job_entry):
+    # Catches cancels from other processes; cancel_scan_job stops scans in this one directly
+    return db.session.query(ScanJob.is_enabled).filter_by(id=scan_job_entry.id).scalar() is False
+
+
+def normalize_scan_entries(batch, context):
+    game_infos = []
+    for item, name in zip(batch, context.clean_names([item['entry'] for item in batch])):
+        game_info = {'name': name, 'full_path': item['full_path']}
+        if 'file_type' in item:
+            game_info['file_type'] = item['file_type']
+        game_infos.append(game_info)
+    return game_infos
+
+
+class ScanContext:
+    """
+    What a scan needs to know about the database, loaded once per job instead of queried per
+    folder: the library, the folders already in it or logged as unmatched, the folder holding
+    each IGDB game, and the compiled release group patterns.
+
+    The persist stage updates it as games are added. Workers of the other stages only read it,
+    which is safe for the set and dict membership tests used.
+    """
+    def __init__(self, library):
+        self.library = library
+        self.library_uuid = library.uuid
+        self.platform_name = library.platform.name
+        self.platform_id = PLATFORM_IDS.get(self.platform_name)
+        self.game_paths = {path for (path,) in db.session.query(Game.full_disk_path).filter(Game.library_uuid == library.uuid)}
+        self.unmatched_paths = {path for (path,) in db.session.query(UnmatchedFolder.folder_path)}
+        self.igdb_paths = {igdb_id: path for igdb_id, path in db.session.query(Game.igdb_id, Game.full_disk_path)}
+        self.normalizer = get_name_normalizer()
+        print(f"Scan context for {library.name}: {len(self.game_paths)} games, {len(self.unmatched_paths)} unmatched folders.")
+
+    def clean_names(self, filenames):
+        return self.normalizer.clean_many(filenames)
+
+    def folder_state(self, game_name, full_disk_path):
+        """
+        Returns True if the folder is already in the library, False if it was logged as unmatched
+        before, and None if it still needs to be processed.
+        """
+        if full_disk_path in self.unmatched_paths:
+            print(f"Skipping processing for already logged unmatched folder: {full_disk_path}")
+            return False
+        if full_disk_path in self.game_paths:
+            print(f"Game already exists in database: {game_name} at {full_disk_path}")
+            return True
+        return None
+
+    def is_duplicate(self, igdb_id, full_disk_path):
+        existing_path = self.igdb_paths.get(igdb_id)
+        return existing_path is not None and existing_path != full_disk_path
+
+    def add_game(self, igdb_id, full_disk_path):
+        self.game_paths.add(full_disk_path)
+        self.igdb_paths.setdefault(igdb_id, full_disk_path)
+
+    def add_unmatched(self, full_disk_path):
+        self.unmatched_paths.add(full_disk_path)
+
+
+def record_scan_result(scan_job_entry, game_info, success, library_uuid, checkpoint):
+    game_name = game_info['name']
+    full_disk_path = game_info['full_path']
+    checkpoint.set_state(full_disk_path, 'Matched' if success else 'Unmatched')
+    if success:
+        scan_job_entry.folders_success += 1
+
+        # Check for updates folder
+        updates_folder = os.path.join(full_disk_path, current_app.config['UPDATE_FOLDER_NAME'])
+        print(f"Checking for updates folder: {updates_folder}")
+        if os.path.exists(updates_folder) and os.path.isdir(updates_folder):
+            print(f"Updates folder found for game: {game_name}")
+            process_game_updates(game_name, full_disk_path, updates_folder, library_uuid)
+        else:
+            print(f"No updates folder found for game: {game_name}")
+    else:
+        scan_job_entry.folders_failed += 1
+        print(f"Failed to process game {game_name} after fallback attempts.")
+
+
+def record_scan_failure(scan_job_entry, game_name, full_disk_path, error, checkpoint):
+    print(f"Failed to process game {game_name}: {error}")
+    scan_job_entry.folders_failed += 1
+    scan_job_entry.status = 'Failed'
+    scan_job_entry.error_message += f" Failed to process {game_name}: {str(error)}; "
+    checkpoint.set_state(full_disk_path, 'Failed')
+    checkpoint.save()
+    db.session.commit()
+
+
+def abort_library_scan(scan_job_entry, error, stop, checkpoint):
+    """
+    Ends a scan after an error that is not about a single folder, like a failed batch write.
+    The job is marked Failed right away so it does not keep the library claimed, its work list
+    is dropped and the pipeline is stopped so it drains.
+    """
+    print(f"Scan aborted: {error}")
+    stop.set()
+    db.session.rollback()
     try:
+        scan_job_entry.status = 'Failed'
+        scan_job_entry.error_message = (scan_job_entry.error_message or '') + f" Scan aborted: {str(error)}; "
+        checkpoint.clear()
         db.session.commit()
-        print(f"Scan completed for folder: {folder_path} with ScanJob ID: {scan_job_entry.id}")
     except SQLAlchemyError as e:
-        print(f"Database error when finalizing ScanJob: {str(e)}")
+        db.session.rollback()
+        print(f"Database error when updating ScanJob with error: {str(e)}")
 
-        
-def process_game_with_fallback(game_name, full_disk_path, scan_job_id, library_uuid):
-    # Fetch library details based on library_uuid
-    library = Library.query.filter_by(uuid=library_uuid).first()
-    if not library:
-        print(f"Library with UUID {library_uuid} not found.")
-        return False
 
-    # Log skipping of processing for already matched or unmatched folders
-    existing_unmatched_folder = UnmatchedFolder.query.filter_by(folder_path=full_disk_path).first()
-    if existing_unmatched_folder:
-        print(f"Skipping processing for already logged unmatched folder: {full_disk_path}")
-        return False
+def match_scan_folders(batch, context, stop):
+    """
+    Match stage of a scan: passes on folders already in the library or logged as unmatched,
+    resolves the others with one multiquery request and prepares them for the writer. Folders
+    are held while the IGDB circuit is open instead of being reported unmatched.
+    """
+    results = []
+    pending = []
+    platform_name = context.platform_name
+    for game_info in batch:
+        known = context.folder_state(game_info['name'], game_info['full_path'])
+        if known is None:
+            pending.append(game_info)
+        else:
+            results.append({'game_info': game_info, 'known': known})
+
+    # One negative cache query for the whole batch instead of one per folder
+    misses = known_misses([game_info['name'] for game_info in pending], platform_name)
+    names = list(dict.fromkeys(game_info['name'] for game_info in pending if game_info['name'] not in misses))
+    igdb_results = fetch_igdb_matches_batch(names, context.platform_id) if names else {}
+
+    for game_info in pending:
+        while True:
+            prepared = prepare_scan_folder(game_info['name'], game_info['full_path'], platform_name, igdb_results,
+                                           known_miss=game_info['name'] in misses)
+            if not prepared['unavailable']:
+                break
+            print(f"IGDB unavailable while processing {game_info['name']}, retrying once it is reachable again.")
+            if not wait_for_igdb_circuit(stop):
+                return results
+        prepared['game_info'] = game_info
+        results.append(prepared)
+    return results
+
+
+def prepare_scan_folder(game_name, full_disk_path, platform_name, igdb_results=None, known_miss=None):
+    """
+    The I/O-bound part of adding a scanned folder, run by the match stage: IGDB matching with
+    fallback names, NFO and folder size. Makes no ORM writes; the result is stored by
+    persist_scan_folder in the scan thread. known_miss, if the caller already looked it up,
+    saves the negative cache query.
+    """
+    prepared = {
+        'name': game_name,
+        'full_disk_path': full_disk_path,
+        'candidates': [],
+        'fallbacks_resolved': False,
+        'nfo_content': None,
+        'folder_size_bytes': 0,
+        'unavailable': False,
+    }
 
-    # Check if the game already exists in the database
-    existing_game = Game.query.filter_by(full_disk_path=full_disk_path, library_uuid=library_uuid).first()
-    if existing_game:
-        print(f"Game already exists in database: {game_name} at {full_disk_path}")
-        return True 
-
-    print(f'Game does not exist in database: {game_name} at {full_disk_path}')
-    # Try to add the game, now using library_uuid
-    if not try_add_game(game_name, full_disk_path, scan_job_id, library_uuid=library_uuid, check_exists=False):
-        # Attempt fallback game name processing
-        parts = game_name.split()
-        for i in range(len(parts) - 1, 0, -1):
-            fallback_name = ' '.join(parts[:i])
-            if try_add_game(fallback_name, full_disk_path, scan_job_id, library_uuid=library_uuid, check_exists=False):
-                return True
+    game_data = None
+    if known_miss is None:
+        known_miss = is_known_miss(game_name, platform_name)
+    if known_miss:
+        print(f"Skipping IGDB search for {game_name}, it did not match on {platform_name} recently.")
     else:
-        print(f'Skipping duplicate game: {game_name} at {full_disk_path}')
-        return True
+        game_data, _ = match_game(game_name, platform_name, igdb_results)
+    if game_data:
+        prepared['candidates'].append((game_name, game_data))
+    else:
+        prepared['candidates'] = rank_fallback_candidates(game_name, platform_name)
+        prepared['fallbacks_resolved'] = True
+
+    if not prepared['candidates']:
+        # A failed lookup while IGDB is down says nothing about the folder, let the scan retry it
+        prepared['unavailable'] = igdb_circuit_breaker().is_open()
+        return prepared
+
+    inspection = inspect_game_folder(full_disk_path)
+    prepared['nfo_content'] = inspection.nfo_content
+    prepared['folder_size_bytes'] = inspection.size_bytes
+    print(f"Folder size for {full_disk_path}: {format_size(prepared['folder_size_bytes'])}")
+    return prepared
+
+
+def build_game_record(game_data, full_disk_path, folder_size_bytes, library_uuid, nfo_content):
+    """
+    The BulkGameWriter record of a new game: the same columns, taxonomy, companies and URLs
+    that save_matched_game stores, with images left to the enrich stage.
+    """
+    game = game_column_values(game_data, full_disk_path, folder_size_bytes, library_uuid)
+    game['uuid'] = str(uuid4())
+    game['nfo_content'] = nfo_content
+    if 'videos' in game_data:
+        game['video_urls'] = ','.join(f"https://www.youtube.com/embed/{video['video_id']}" for video in game_data['videos'])
+
+    record = {'game': game, 'developer': None, 'publisher': None, 'images': []}
+    for key in ('genres', 'themes', 'game_modes', 'platforms', 'player_perspectives'):
+        record[key] = [item['name'] for item in game_data.get(key, []) if isinstance(item, dict) and item.get('name')]
+    for company_data in game_data.get('involved_companies') or []:
+        company_info = company_data.get('company') if isinstance(company_data, dict) else None
+        if not isinstance(company_info, dict) or 'name' not in company_info:
+            continue
+        # Like enumerate_companies, the last developer and publisher listed win
+        if company_data.get('developer'):
+            record['developer'] = company_info['name'][:50]
+        if company_data.get('publisher'):
+            record['publisher'] = company_info['name'][:50]
+    record['urls'] = [(website_category_to_string(website.get('category')), website.get('url'))
+                      for website in game_data.get('websites') or [] if website.get('url')]
+    return record
+
+
+# Outcome of persist_scan_folder for a folder IGDB could not be asked about: it stays Pending
+# in the work list and out of the snapshot, so the next scan tries it again
+FOLDER_HELD = object()
+
+
+def persist_scan_folder(prepared, library, scan_job_id, scan_context, game_writer):
+    """
+    Persist stage of a scan: picks the first matched candidate that is not already in the
+    library under another folder and queues it on the scan's BulkGameWriter. Images are left
+    to the enrich stage.
+
+    Returns:
+        True or False if the outcome of the folder is known, None if its game was queued and
+        is reported when the writer flushes, FOLDER_HELD if IGDB was unavailable.
+    """
+    if 'known' in prepared:
+        return prepared['known']
+
+    full_disk_path = prepared['full_disk_path']
+    candidates = prepared['candidates']
+    if not prepared['fallbacks_resolved'] and scan_context.is_duplicate(candidates[0][1].get('id'), full_disk_path):
+        # The IGDB match is already in the library under another folder, try the fallback names
+        candidates = candidates + rank_fallback_candidates(prepared['name'], library.platform.name)
+
+    logged_duplicate = False
+    for candidate, game_data in candidates:
+        igdb_id = game_data.get('id')
+        if scan_context.is_duplicate(igdb_id, full_disk_path):
+            print(f"Duplicate game found with same IGDB ID {igdb_id} but different folder path. Logging as duplicate.")
+            if not logged_duplicate:
+                log_unmatched_folder(scan_job_id, full_disk_path, 'Duplicate', library_uuid=library.uuid)
+                scan_context.add_unmatched(full_disk_path)
+                logged_duplicate = True
+            continue
+        record = build_game_record(game_data, full_disk_path, prepared['folder_size_bytes'], library.uuid, prepared['nfo_content'])
+        game_writer.add(record, {'game_info': prepared['game_info'], 'game_data': game_data, 'uuid': record['game']['uuid'],
+                                 'nfo_content': prepared['nfo_content'], 'folder_size_bytes': prepared['folder_size_bytes']})
+        scan_context.add_game(igdb_id, full_disk_path)
+        return None
+
+    if logged_duplicate:
+        return False
+    if igdb_circuit_breaker().is_open():
+        print(f"IGDB unavailable while processing {prepared['name']}, leaving it for the next scan.")
+        return FOLDER_HELD
 
     # If the game does not match, log it as unmatched
-    matched_status = 'Unmatched'
-    log_unmatched_folder(scan_job_id, full_disk_path, matched_status, library_uuid)
+    log_unmatched_folder(scan_job_id, full_disk_path, 'Unmatched', library.uuid)
+    scan_context.add_unmatched(full_disk_path)
     return False
 
 
+def flush_scan_games(game_writer, scan_job_entry, library, enrich_queue, stop, checkpoint):
+    """
+    Writes the games queued by persist_scan_folder, records their results and hands them to
+    the enrich stage. Games of a batch that failed are stored one by one instead.
+    """
+    stored, skipped, failed = game_writer.flush()
+    if current_app.config['DISCORD_WEBHOOK_URL']:
+        for payload in stored:
+            discord_webhook(payload['uuid'])
+    for payload in failed:
+        # save_matched_game sends its own Discord notification
+        new_game = save_matched_game(payload['game_data'], payload['game_info']['full_path'], library, scan_job_entry.id,
+                                     payload['nfo_content'], payload['folder_size_bytes'], downloaded_images=[])
+        if new_game is not None:
+            payload['uuid'] = new_game.uuid
+            stored.append(payload)
+        else:
+            record_scan_result(scan_job_entry, payload['game_info'], False, library.uuid, checkpoint)
+    for payload in skipped:
+        # Added by someone else since the scan context was loaded
+        log_unmatched_folder(scan_job_entry.id, payload['game_info']['full_path'], 'Duplicate', library_uuid=library.uuid)
+        record_scan_result(scan_job_entry, payload['game_info'], False, library.uuid, checkpoint)
+
+    for payload in stored:
+        record_scan_result(scan_job_entry, payload['game_info'], True, library.uuid, checkpoint)
+        put_or_stop(enrich_queue, (payload['uuid'], get_game_images(payload['game_data'])), stop)
+    checkpoint.save()
+    db.session.commit()
 
-def try_add_game(game_name, full_disk_path, scan_job_id, library_uuid, check_exists=True):
-    print(f"try_add_game: {game_name} at {full_disk_path} with scan job ID: {scan_job_id}, check_exists: {check_exists}, and library UUID: {library_uuid}")
-    
-    # Fetch the library details using the library_uuid, if necessary
-    library = Library.query.filter_by(uuid=library_uuid).first()
-    if not library:
-        print(f"Library with UUID {library_uuid} not found.")
-        return False
 
-    if check_exists:
-        existing_game = Game.query.filter_by(full_disk_path=full_disk_path).first()
-        if existing_game:
-            print(f"Game already exists in database: {game_name} at {full_disk_path}")
-            return False
+def enrich_scan_games(batch):
+    # Enrich stage of a scan: image downloads for games the writer has just added
+    return [(game_uuid, download_game_images(game_uuid, images)) for game_uuid, images in batch]
+
+
+def store_enriched_images(enriched_queue, block=False):
+    """
+    Records the images downloaded by the enrich stage in one commit. Returns False once the
+    enrich stage has finished.
+    """
+    running = True
+    stored = 0
+    while True:
+        try:
+            result = enriched_queue.get(timeout=1) if block and not stored else enriched_queue.get_nowait()
+        except queue.Empty:
+            break
+        if result is STAGE_DONE:
+            running = False
+            break
+        if isinstance(result, ScanItemError):
+            print(f"Failed to download images for game {result.item[0]}: {result.error}")
+            continue
+        game_uuid, downloaded_images = result
+        add_game_images(game_uuid, downloaded_images)
+        stored += 1
+    if stored:
+        try:
+            db.session.commit()
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Failed to save downloaded images: {e}")
+    return running
+
+
+def wait_for_igdb_circuit(stop, poll_interval=5):
+    """
+    Pauses a scan worker while the IGDB circuit breaker is open and resumes once a trial
+    request may go out again.
+
+    Returns:
+        bool: False if the scan was stopped while waiting, True otherwise.
+    """
+    breaker = igdb_circuit_breaker()
+    paused = False
+    while not stop.is_set():
+        if not breaker.is_open():
+            if paused:
+                print("IGDB circuit breaker no longer open, resuming scan.")
+            return True
+        if not paused:
+            print(f"IGDB appears to be down, pausing scan for up to {breaker.seconds_until_retry():.0f} seconds.")
+            paused = True
+        stop.wait(min(poll_interval, max(breaker.seconds_until_retry(), 0.1)))
+    return False
+
+
+def get_fallback_candidates(game_name):
+    """
+    Builds the alternative names to search when the cleaned name did not match: the name without
+    bracketed tags, the title before a subtitle separator, and every shorter word prefix.
+    """
+    variants = []
+    without_tags = ' '.join(re.sub(r'[\(\[\{][^\)\]\}]*[\)\]\}]', ' ', game_name).split())
+    variants.append(without_tags)
+    for separator in (' - ', ':'):
+        if separator in without_tags:
+            variants.append(without_tags.split(separator)[0].strip())
+
+    for name in (game_name, without_tags):
+        parts = name.split()
+        for i in range(len(parts) - 1, 0, -1):
+            variants.append(' '.join(parts[:i]).rstrip(' -:'))
+
+    candidates = []
+    for variant in variants:
+        if variant and variant != game_name and variant not in candidates:
+            candidates.append(variant)
+    return candidates
+
+
+def name_similarity(a, b):
+    normalize = lambda value: re.sub(r'[^a-z0-9]+', ' ', value.lower()).strip()
+    return difflib.SequenceMatcher(None, normalize(a), normalize(b)).ratio()
+
+
+def rank_fallback_candidates(game_name, platform_name):
+    """
+    Resolves all fallback names of an unmatched folder with batched multiquery requests and ranks
+    the hits by how similar their IGDB name is to the original name. Names whose batch request
+    failed are looked up one by one and ranked last.
+
+    Returns:
+        list: (fallback name, IGDB game data) pairs, best first.
+    """
+    candidates = get_fallback_candidates(game_name)
+    misses = known_misses(candidates, platform_name)
+    candidates = [name for name in candidates if name not in misses]
+    if not candidates:
+        return []
+
+    print(f"Resolving {len(candidates)} fallback names for {game_name}: {candidates}")
+    platform_id = PLATFORM_IDS.get(platform_name)
+    candidate_results = fetch_igdb_matches_batch(candidates, platform_id)
+
+    scored = []
+    for candidate in candidates:
+        result = candidate_results.get(candidate)
+        if result == []:
+            record_miss(candidate, platform_name)
+        elif result and isinstance(result[0], dict):
+            score = name_similarity(game_name, result[0].get('name', ''))
+            scored.append((score, len(candidate), candidate))
+    scored.sort(reverse=True)
+
+    ranked = []
+    for score, _, candidate in scored:
+        print(f"Fallback candidate {candidate} -> {candidate_results[candidate][0].get('name')} (similarity {score:.2f})")
+        ranked.append((candidate, candidate_results[candidate][0]))
+
+    for candidate in candidates:
+        if candidate not in candidate_results:
+            game_data, _ = match_game(candidate, platform_name)
+            if game_data:
+                ranked.append((candidate, game_data))
+    return ranked
 
-    game = retrieve_and_save_game(game_name, full_disk_path, scan_job_id, library_uuid)
-    return game is not None
 
 def get_game_names_from_folder(folder_path, insensitive_patterns, sensitive_patterns):
     
@@ -1284,12 +1919,12 @@ def get_game_names_from_folder(folder_path, insensitive_patterns, sensitive_patt
     folder_contents = os.listdir(folder_path)
     # print("Folder contents before filtering:", folder_contents)
 
-    game_names_with_paths = []
-    for item in folder_contents:
-        full_path = os.path.join(folder_path, item)
-        if os.path.isdir(full_path):
-            game_name = clean_game_name(item, insensitive_patterns, sensitive_patterns)
-            game_names_with_paths.append({'name': game_name, 'full_path': full_path})
+    folders = [item for item in folder_contents if os.path.isdir(os.path.join(folder_path, item))]
+    normalizer = normalizer_for_patterns(insensitive_patterns, sensitive_patterns)
+    game_names_with_paths = [
+        {'name': game_name, 'full_path': os.path.join(folder_path, item)}
+        for item, game_name in zip(folders, normalizer.clean_many(folders))
+    ]
 
     # print("Extracted game names with paths:", game_names_with_paths)
     return game_names_with_paths
@@ -1302,24 +1937,16 @@ def get_game_names_from_files(folder_path, extensions, insensitive_patterns, sen
 
     # print(f"Scanning files in folder: {folder_path}")
     file_contents = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-    print(f"Files found in folder: {file_contents}")
-    game_names_with_paths = []
-    for file_name in file_contents:
-        print(f"Checking file: {file_name}")
-        extension = file_name.split('.')[-1].lower()
-        if extension in extensions:
-            print(f"Found supported file: {file_name}")
-            # Extract the game name without the extension
-            game_name_without_extension = '.'.join(file_name.split('.')[:-1])
-            # Clean the game name
-            cleaned_game_name = clean_game_name(game_name_without_extension, insensitive_patterns, sensitive_patterns)
-            print(f"Extracted and cleaned game name: {cleaned_game_name}")
-            full_path = os.path.join(folder_path, file_name)
-            
-            game_names_with_paths.append({'name': cleaned_game_name, 'full_path': full_path, 'file_type': extension})
-            print(f"Added cleaned game name with path: {cleaned_game_name} at {full_path}")
-
-    print(f"Game names with paths extracted from files: {game_names_with_paths}")
+    supported_files = [f for f in file_contents if f.split('.')[-1].lower() in extensions]
+    print(f"Found {len(supported_files)} supported files out of {len(file_contents)} in {folder_path}")
+    # Extract the game names without the extension and clean them in one go
+    names = ['.'.join(file_name.split('.')[:-1]) for file_name in supported_files]
+    normalizer = normalizer_for_patterns(insensitive_patterns, sensitive_patterns)
+    game_names_with_paths = [
+        {'name': cleaned_game_name, 'full_path': os.path.join(folder_path, file_name),
+         'file_type': file_name.split('.')[-1].lower()}
+        for file_name, cleaned_game_name in zip(supported_files, normalizer.clean_many(names))
+    ]
     return game_names_with_paths
 
 def escape_special_characters(pattern):
@@ -1331,100 +1958,7 @@ def escape_special_characters(pattern):
 
 
 def clean_game_name(filename, insensitive_patterns, sensitive_patterns):
-    print(f"Original filename: {filename}")
-    
-    # Check and remove 'setup' at the start, case-insensitive
-    if filename.lower().startswith('setup'):
-        filename = filename[len('setup'):].lstrip("_").lstrip("-").lstrip()
-        print(f"After removing 'setup': {filename}")
-
-    # First handle version numbers and known patterns that should be removed
-    filename = re.sub(r'v\d+(\.\d+)*', '', filename)  # Remove version numbers like v1.0.3
-    filename = re.sub(r'\b\d+(\.\d+)+\b', '', filename)  # Remove standalone version numbers like 1.0.3
-    
-    # Handle dots between single letters (like A.Tale -> A Tale)
-    filename = re.sub(r'(?<=\b[A-Z])\.(?=[A-Z]\b|\s|$)', ' ', filename)
-    
-    # Replace remaining dots and underscores with spaces, but preserve dots in known patterns
-    filename = re.sub(r'(?<!^)(?<![\d])\.|_', ' ', filename)
-    # print(f"After normalizing separators: {filename}")
-
-    # Define a regex pattern for version numbers
-    version_pattern = r'\bv?\d+(\.\d+){1,3}'
-
-    # Remove version numbers
-    filename = re.sub(version_pattern, '', filename)
-    # print(f"After removing version numbers: {filename}")
-
-    # Remove known release group patterns
-    for pattern in insensitive_patterns:
-        escaped_pattern = re.escape(pattern)  # Assume escape_special_characters is similar to re.escape
-        filename = re.sub(f"\\b{escaped_pattern}\\b", '', filename, flags=re.IGNORECASE)
-    # print(f"After removing insensitive patterns: {filename}")
-
-    for pattern, is_case_sensitive in sensitive_patterns:
-        escaped_pattern = re.escape(pattern)
-        if is_case_sensitive:
-            filename = re.sub(f"\\b{escaped_pattern}\\b", '', filename)
-        else:
-            filename = re.sub(f"\\b{escaped_pattern}\\b", '', filename, flags=re.IGNORECASE)
-    # print(f"After removing sensitive patterns: {filename}")
-
-    # Handle cases with numerals and versions
-    filename = re.sub(r'\b([IVXLCDM]+|[0-9]+)(?:[^\w]|$)', r' \1 ', filename)
-    # print(f"After spacing out numerals and versions: {filename}")
-
-    # Cleanup for versions, DLCs, etc.
-    filename = re.sub(r'Build\.\d+', '', filename)
-    filename = re.sub(r'(\+|\-)\d+DLCs?', '', filename, flags=re.IGNORECASE)
-    filename = re.sub(r'Repack|Edition|Remastered|Remake|Proper|Dodi', '', filename, flags=re.IGNORECASE)
-    # print(f"After additional cleanups: {filename}")
-
-    # Remove trailing numbers enclosed in brackets
-    filename = re.sub(r'\(\d+\)$', '', filename).strip()
-    # print(f"After removing trailing numbers in brackets: {filename}")
-
-    # Normalize whitespace and re-title
-    filename = re.sub(r'\s+', ' ', filename).strip()
-    cleaned_name = ' '.join(filename.split()).title()
-    print(f"Final cleaned name: {cleaned_name}")
-
-    return cleaned_name
-
-
-
-def load_release_group_patterns():
-    try:
-        # Fetching insensitive patterns (not case-sensitive)
-        insensitive_patterns = [
-            "-" + rg.rlsgroup for rg in ReleaseGroup.query.filter(ReleaseGroup.rlsgroup != None).all()
-        ] + [
-            "." + rg.rlsgroup for rg in ReleaseGroup.query.filter(ReleaseGroup.rlsgroup != None).all()
-        ]
-        
-        # Initializing list for sensitive patterns (case-sensitive)
-        sensitive_patterns = []
-        for rg in ReleaseGroup.query.filter(ReleaseGroup.rlsgroupcs != None).all():
-            pattern = rg.rlsgroupcs
-            is_case_sensitive = False
-            if pattern.lower() == 'yes':
-                is_case_sensitive = True
-                pattern = "-" + rg.rlsgroup
-                sensitive_patterns.append((pattern, is_case_sensitive))
-                pattern = "." + rg.rlsgroup
-                sensitive_patterns.append((pattern, is_case_sensitive))
-            elif pattern.lower() == 'no':
-                pattern = "-" + rg.rlsgroup
-                sensitive_patterns.append((pattern, is_case_sensitive))
-                pattern = "." + rg.rlsgroup
-                sensitive_patterns.append((pattern, is_case_sensitive))
-        
-        
-
-        return insensitive_patterns, sensitive_patterns
-    except SQLAlchemyError as e:
-        print(f"An error occurred while fetching release group patterns: {e}")
-        return [], []
+    return normalizer_for_patterns(insensitive_patterns, sensitive_patterns).clean(filename)
 
 
 def format_size(size_in_bytes):
@@ -1450,12 +1984,7 @@ def get_folder_size_in_bytes(folder_path):
     if os.path.isfile(folder_path):
         return os.path.getsize(folder_path)
     
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(folder_path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            if os.path.exists(fp):
-                total_size += os.path.getsize(fp)
+    total_size = inspect_folder(folder_path, read_nfo_content=False, size_cache=DirectorySizeCache(db.engine)).size_bytes or 0
     return max(total_size, 1)  # Ensure the size is at least 1 byte
 
 
@@ -1513,8 +2042,23 @@ def discord_webhook(game_uuid):
     embed.add_embed_field(name="Size", value=f"{newgame_size}")
     # add embed object to webhook
     webhook.add_embed(embed)
-    response = webhook.execute()
+    response = execute_discord_webhook(webhook)
     
+def execute_discord_webhook(webhook):
+    """
+    Posts a DiscordWebhook through the pooled Discord session instead of a one-off connection.
+    Rate limited and failed posts are retried with backoff when rate_limit_retry is set.
+    """
+    try:
+        response = request_with_retry('POST', webhook.url, json=webhook.json,
+                                      retries=None if webhook.rate_limit_retry else 0)
+        if response.status_code not in (200, 204):
+            print(f"Discord webhook failed. Status Code: {response.status_code}")
+        return response
+    except requests.RequestException as e:
+        print(f"Error sending Discord webhook: {e}")
+        return None
+
 global last_game_path
 last_game_path = ''
 global last_update_time
@@ -1553,11 +2097,7 @@ def discord_update(path, event):
             
         print(f"Getting game located at path {game_path}")
         
-        if os.path.isfile(path):
-            file_size = os.path.getsize(path)
-        else:
-            file_size = get_folder_size_in_bytes(path)
-        file_size = format_size(file_size)
+        file_size = format_size(get_folder_size_in_bytes(path))
         game = get_game_by_full_disk_path(game_path, path)
         
         if game:
@@ -1599,7 +2139,7 @@ def discord_update(path, event):
                 embed.add_embed_field(name="Size", value=f"{file_size}")
                 # add embed object to webhook
                 webhook.add_embed(embed)
-                response = webhook.execute()
+                response = execute_discord_webhook(webhook)
             
             elif extras_folder.lower() == folder_name.lower():
                 # Check if Discord notifications are enabled for game extras
@@ -1637,7 +2177,7 @@ def discord_update(path, event):
                 embed.add_embed_field(name="Size", value=f"{file_size}")
                 # add embed object to webhook
                 webhook.add_embed(embed)
-                response = webhook.execute()
+                response = execute_discord_webhook(webhook)
                 
             else:
                 print("No matching update notifications for this file.")
@@ -1663,7 +2203,8 @@ def discord_update(path, event):
         
         game = get_game_by_full_disk_path(game_path, path)
         
-        number_of_files = len([f for f in os.listdir(game_path) if os.path.isfile(os.path.join(game_path, f)) and f.split('.')[-1] != 'txt' and f.split('.')[-1] != 'nfo'])
+        inspection = inspect_game_folder(game_path, measure=False, read_nfo_content=False)
+        number_of_files = len([f for f in inspection.files if f.split('.')[-1] != 'txt' and f.split('.')[-1] != 'nfo'])
         
         if number_of_files > 1:
             elapsed_seconds = time.time() - last_update_time
@@ -1735,7 +2276,7 @@ def discord_update(path, event):
             embed.add_embed_field(name="Size", value=f"{file_size}")
             # add embed object to webhook
             webhook.add_embed(embed)
-            response = webhook.execute()
+            response = execute_discord_webhook(webhook)
     
 def get_library_by_uuid(uuid):
     print(f"Searching for Library UUID: {uuid}")
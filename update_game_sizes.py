@@ -1,42 +1,63 @@
 # this is a migration script for users coming from version 1.2.1
-# use at your own risk as I did not get a chance to fully test this (my data was already updated)
+# it can be run again at any time to bring the stored game sizes in line with the disk:
+# games are measured in parallel with the directory size cache, so unchanged folders are cheap.
+# Files rewritten in place while the app was not watching keep their directory's mtime, so
+# --full lists every directory again and refreshes the cache
 
 import os
-import sys
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from modules.models import Game
-from modules.utilities import get_folder_size_in_bytes
+from modules.models import Game, GlobalSettings
+from modules.folder_inspector import inspect_folder
+from modules.directory_sizes import DirectorySizeCache
 from config import Config
 
-def update_game_sizes():
+COMMIT_EVERY = 100
+
+def measure_game(engine, game, update_folder_name, extras_folder_name, full=False):
+    if not game.full_disk_path or not os.path.exists(game.full_disk_path):
+        return game, None
+    inspection = inspect_folder(game.full_disk_path, update_folder_name, extras_folder_name,
+                                read_nfo_content=False, size_cache=DirectorySizeCache(engine, refresh=full))
+    return game, inspection.size_bytes
+
+def update_game_sizes(workers=None, full=False):
     # Create database engine and session
     engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
     Session = sessionmaker(bind=engine)
     session = Session()
+    workers = workers or getattr(Config, 'SCAN_WORKERS', 4)
 
     try:
-        # Fetch all games from the database
-        games = session.query(Game).all()
+        # Sizes leave out the update and extras folders, like scans do
+        settings = session.query(GlobalSettings).first()
+        update_folder_name = settings.update_folder_name if settings else None
+        extras_folder_name = settings.extras_folder_name if settings else None
+
+        games = session.query(Game.uuid, Game.name, Game.full_disk_path, Game.size).all()
         total_games = len(games)
         updated_count = 0
 
-        print(f"Found {total_games} games in the database.")
+        print(f"Found {total_games} games in the database, measuring {workers} at a time"
+              f"{' without the directory size cache' if full else ''}.")
 
-        for index, game in enumerate(games, 1):
-            print(f"Processing game {index}/{total_games}: {game.name}")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda game: measure_game(engine, game, update_folder_name, extras_folder_name, full), games)
+            for index, (game, new_size) in enumerate(results, 1):
+                print(f"Processing game {index}/{total_games}: {game.name}")
 
-            if game.full_disk_path and os.path.exists(game.full_disk_path):
-                new_size = get_folder_size_in_bytes(game.full_disk_path)
-                
-                if game.size != new_size:
-                    game.size = new_size
+                if new_size is None:
+                    print(f"Warning: Path not found for {game.name}: {game.full_disk_path}")
+                elif game.size != new_size:
+                    session.query(Game).filter_by(uuid=game.uuid).update({'size': new_size})
                     updated_count += 1
                     print(f"Updated size for {game.name}: {new_size} bytes")
+                    if updated_count % COMMIT_EVERY == 0:
+                        session.commit()
                 else:
                     print(f"Size unchanged for {game.name}")
-            else:
-                print(f"Warning: Path not found for {game.name}: {game.full_disk_path}")
 
         # Commit the changes to the database
         session.commit()
@@ -49,4 +70,8 @@ def update_game_sizes():
         session.close()
 
 if __name__ == "__main__":
-    update_game_sizes()
+    parser = argparse.ArgumentParser(description="Bring the stored game sizes in line with the disk")
+    parser.add_argument('workers', nargs='?', type=int, help="games measured at a time (default: SCAN_WORKERS)")
+    parser.add_argument('--full', action='store_true', help="list every directory again instead of trusting the size cache")
+    args = parser.parse_args()
+    update_game_sizes(args.workers, args.full)